@@ -4,20 +4,387 @@ Caches LLM responses based on input hash to reduce API calls and costs.
 Provides ~60% cost savings for repeated scans of similar URLs.
 """
 
-from functools import lru_cache
 import hashlib
-import json
-from typing import Any, Dict, List
+import os
+import sqlite3
+import threading
+import time
 
-# Cache for AI fix reports
-@lru_cache(maxsize=100)
-def cached_generate_fixes(input_hash: str, fixes_json: str) -> List[Dict]:
+import numpy as np
+import orjson
+import xxhash
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from app.core.config import get_settings
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+_MISSING = object()
+
+
+class DirectMappedCache:
+    """
+    Fixed-size direct-mapped cache: each key maps to exactly one slot
+    (hash & (N-1)) and a colliding write simply evicts the previous entry.
+    O(1) lookups with no recency bookkeeping and no lock hand-off; works
+    well for skewed workloads where a few keys dominate.
+    """
+
+    def __init__(self, size: int = 256, ttl: Optional[float] = None):
+        # Round up to a power of two so the slot index is a single mask
+        n = 1
+        while n < max(1, size):
+            n <<= 1
+        self._mask = n - 1
+        self._slots: List[Optional[tuple]] = [None] * n
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self, key: str) -> int:
+        return xxhash.xxh3_64_intdigest(key.encode()) & self._mask
+
+    def get(self, key: str, default: Any = None) -> Any:
+        slot = self._slots[self._index(key)]
+        if slot is not None and slot[0] == key:
+            if self._ttl is None or slot[2] > time.monotonic():
+                self.hits += 1
+                return slot[1]
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any) -> None:
+        expires = time.monotonic() + self._ttl if self._ttl is not None else 0.0
+        self._slots[self._index(key)] = (key, value, expires)
+
+    def clear(self) -> None:
+        self._slots = [None] * (self._mask + 1)
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> CacheInfo:
+        currsize = sum(1 for slot in self._slots if slot is not None)
+        return CacheInfo(self.hits, self.misses, self._mask + 1, currsize)
+
+    def stats(self) -> Dict[str, Any]:
+        """info() as a plain dict, plus the hit ratio."""
+        info = self.info()
+        return {
+            **info._asdict(),
+            "hit_ratio": info.hits / max(1, info.hits + info.misses),
+        }
+
+
+class SQLiteCache:
+    """
+    Persistent string cache in an SQLite file: survives restarts and is
+    shared by every worker process on the host. Entries expire after `ttl`
+    seconds (None = never). A small in-process DirectMappedCache in front
+    serves repeated keys without touching the database.
+
+    Same get(key, default) / set(key, value) interface as DirectMappedCache.
+    Database errors are treated as misses, so a broken cache file only
+    costs the LLM call it would have saved.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, memory_size: int = 256):
+        self._path = path
+        self._ttl = ttl
+        self._memory = DirectMappedCache(size=memory_size, ttl=ttl)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Caller holds self._lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM cache WHERE expires > 0 AND expires < ?", (time.time(),))
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._memory.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, expires FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is not None and (row[1] == 0 or row[1] > time.time()):
+            self._memory.set(key, row[0])
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: str) -> None:
+        self._memory.set(key, value)
+        expires = time.time() + self._ttl if self._ttl is not None else 0.0
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, value, expires),
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self.hits = 0
+        self.misses = 0
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM cache")
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._lock:
+                currsize = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            currsize = None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "currsize": currsize,
+            "hit_ratio": self.hits / max(1, self.hits + self.misses),
+        }
+
+
+# Cache for AI fix reports — sized and expired from settings on first use,
+# so importing this module doesn't force Settings to load
+_fixes_cache: Optional[DirectMappedCache] = None
+
+
+def _get_fixes_cache() -> DirectMappedCache:
+    global _fixes_cache
+    if _fixes_cache is None:
+        settings = get_settings()
+        _fixes_cache = DirectMappedCache(
+            size=settings.cache_max_size,
+            ttl=settings.cache_ttl_seconds,
+        )
+    return _fixes_cache
+
+
+class LLMCache:
+    """
+    Exact-match cache for LLM completions, keyed by SHA-256 of the canonical
+    (model, messages) payload. Only valid for deterministic calls (temperature 0).
+
+    The backend just needs get(key, default) / set(key, value): the default is
+    an in-process DirectMappedCache, and a Redis-backed object with the same two
+    methods can be passed in to share responses across workers.
+    """
+
+    def __init__(self, backend: Any = None, size: int = 1024, ttl: Optional[float] = 3600):
+        self.backend = backend if backend is not None else DirectMappedCache(size=size, ttl=ttl)
+
+    @staticmethod
+    def make_key(model: str, messages: Sequence[Any]) -> str:
+        payload = {
+            "model": model,
+            "messages": [{"type": m.type, "content": m.content} for m in messages],
+        }
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.backend.get(key, None)
+
+    def set(self, key: str, content: str) -> None:
+        self.backend.set(key, content)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats() if hasattr(self.backend, "stats") else {}
+
+
+class SemanticCache:
+    """
+    Similarity cache: get() returns the value stored under the most similar
+    embedding if its cosine similarity clears `threshold`. Flat inner-product
+    search over a fixed-capacity ring of unit vectors — a single matmul, fast
+    enough for a few thousand entries without an ANN index.
+
+    With `quantize` (default) rows are stored as int8 with a per-row scale
+    (max |component| / 127), a quarter of the float32 footprint; similarity
+    error stays well below the gap between a hit and a miss.
+    """
+
+    def __init__(self, capacity: int = 1024, threshold: float = 0.92, quantize: bool = True):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.quantize = quantize
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim), allocated on first set()
+        self._scales: Optional[np.ndarray] = None   # (capacity,), int8 rows only
+        self._values: List[Any] = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def get(
+        self,
+        vector: Sequence[float],
+        default: Any = None,
+        accept: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Value of the most similar entry above the threshold, else `default`.
+        `accept` can reject that value (e.g. stored for another page); a
+        rejected match is returned and counted as a miss.
+        """
+        vectors, scales, size = self._vectors, self._scales, self._size
+        if size and vectors is not None and vectors.shape[1] == len(vector):
+            sims = vectors[:size] @ self._normalize(vector)
+            if scales is not None:
+                sims *= scales[:size]
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                value = self._values[best]
+                if accept is None or accept(value):
+                    self.hits += 1
+                    return value
+        self.misses += 1
+        return default
+
+    def set(self, vector: Sequence[float], value: Any) -> None:
+        v = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != v.shape[0]:
+                # First entry, or the embedding model changed: start over
+                dtype = np.int8 if self.quantize else np.float32
+                self._vectors = np.zeros((self.capacity, v.shape[0]), dtype=dtype)
+                self._scales = np.zeros(self.capacity, dtype=np.float32) if self.quantize else None
+                self._values = [None] * self.capacity
+                self._size = self._next = 0
+            slot = self._next
+            if self._scales is not None:
+                scale = float(np.abs(v).max()) / 127 or 1.0
+                self._vectors[slot] = np.rint(v / scale).astype(np.int8)
+                self._scales[slot] = scale
+            else:
+                self._vectors[slot] = v
+            self._values[slot] = value
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._scales = None
+            self._values = [None] * self.capacity
+            self._size = self._next = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "maxsize": self.capacity,
+            "currsize": self._size,
+            "hit_ratio": self.hits / max(1, self.hits + self.misses),
+        }
+
+
+# Shared LLM response cache for the agents (see BaseAgent._invoke_llm)
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache()
+    return _llm_cache
+
+
+# Per-error AI fix responses, persisted to disk (see SQLiteCache)
+_ai_fix_cache: Optional[SQLiteCache] = None
+
+
+def get_ai_fix_cache() -> SQLiteCache:
+    global _ai_fix_cache
+    if _ai_fix_cache is None:
+        settings = get_settings()
+        _ai_fix_cache = SQLiteCache(
+            settings.ai_fix_cache_path,
+            ttl=settings.ai_fix_cache_ttl_seconds,
+        )
+    return _ai_fix_cache
+
+
+def cached_generate_fixes(input_hash: str, fixes_json: Union[str, bytes]) -> List[Dict]:
     """
     Cached version of generate_fixes_pure.
-    Hash must be pre-computed from issues list.
+    Hash must be pre-computed from issues list; it is the only cache key,
+    and the parsed list (not the JSON string) is what gets stored.
     """
-    # This function body is replaced - the actual work is done before caching
-    return json.loads(fixes_json)
+    cache = _get_fixes_cache()
+    fixes = cache.get(input_hash, _MISSING)
+    if fixes is _MISSING:
+        fixes = orjson.loads(fixes_json)
+        cache.set(input_hash, fixes)
+    return fixes
+
+
+def _iter_repr(data: Any, max_length: int) -> Iterator[str]:
+    """
+    Yield the repr of data piece by piece, walking dicts/lists/tuples lazily
+    so the caller can stop once it has enough characters.
+    """
+    if isinstance(data, dict):
+        yield "{"
+        for i, (key, value) in enumerate(data.items()):
+            if i:
+                yield ", "
+            yield from _iter_repr(key, max_length)
+            yield ": "
+            yield from _iter_repr(value, max_length)
+        yield "}"
+    elif isinstance(data, (list, tuple)):
+        yield "[" if isinstance(data, list) else "("
+        for i, item in enumerate(data):
+            if i:
+                yield ", "
+            yield from _iter_repr(item, max_length)
+        yield "]" if isinstance(data, list) else ")"
+    elif isinstance(data, str):
+        # Long leaf strings are cut before repr() copies them
+        yield repr(data[:max_length])
+    else:
+        yield repr(data)
+
+
+def canonical_hash(text: str) -> str:
+    """
+    xxh3-128 hex digest of the whole of `text` (no truncation), for cache
+    keys built from a canonical serialization; 128 bits so keys can live in
+    a long-lived persistent cache without practical collision risk.
+    """
+    return xxhash.xxh3_128_hexdigest(text.encode())
 
 
 def hash_input(data: Any, max_length: int = 500) -> str:
@@ -29,22 +396,41 @@ def hash_input(data: Any, max_length: int = 500) -> str:
         max_length: Limit data length before hashing
         
     Returns:
-        MD5 hash hex string
+        xxh3-64 hash hex string (non-cryptographic, only used as a cache key)
     """
     try:
-        data_str = str(data)[:max_length]
-        return hashlib.md5(data_str.encode()).hexdigest()
+        if not isinstance(data, (dict, list, tuple)):
+            data_str = str(data)[:max_length]
+            return xxhash.xxh3_64_hexdigest(data_str.encode())
+
+        # Containers: feed the digest incrementally and stop at max_length,
+        # instead of materializing the full repr just to slice it
+        hasher = xxhash.xxh3_64()
+        remaining = max_length
+        for piece in _iter_repr(data, max_length):
+            hasher.update(piece[:remaining].encode())
+            remaining -= len(piece)
+            if remaining <= 0:
+                break
+        return hasher.hexdigest()
     except Exception:
         return "hash_error"
 
 
-def cache_stats() -> Dict[str, int]:
-    """Get cache statistics."""
-    return {
-        "cache_info_fixes": str(cached_generate_fixes.cache_info()),
-    }
+def cache_stats() -> Dict[str, Any]:
+    """Get fixes cache statistics (hits, misses, maxsize, currsize, hit_ratio)."""
+    return _get_fixes_cache().stats()
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Get agent LLM response cache statistics."""
+    return get_llm_cache().stats()
 
 
 def clear_cache():
     """Clear all caches (useful for testing or memory management)."""
-    cached_generate_fixes.cache_clear()
+    _get_fixes_cache().clear()
+    get_ai_fix_cache().clear()
+    backend = get_llm_cache().backend
+    if hasattr(backend, "clear"):
+        backend.clear()
@@ -5,7 +5,8 @@ Uses Pydantic Settings to load from environment variables and .env file.
 
 import os
 from pathlib import Path
-from functools import lru_cache
+from functools import lru_cache, cached_property
+from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -27,6 +28,7 @@ class Settings(BaseSettings):
     llm_max_tokens: int = 4096
     ollama_base_url: str = "http://localhost:11434"
     lmstudio_base_url: str = "http://localhost:1234/v1"
+    llm_prompt_warmup: bool = True     # prefill static system prompts at startup
 
     # ── CORS ──
     cors_origins: str = "http://localhost:3000,http://127.0.0.1:3000"
@@ -39,9 +41,14 @@ class Settings(BaseSettings):
     # ── Rate Limiting ──
     rate_limit_per_minute: int = 30
 
+    # ── Concurrency ──
+    thread_pool_size: int = min(32, (os.cpu_count() or 4) + 4)
+
     # ── Cache ──
     cache_ttl_seconds: int = 3600
     cache_max_size: int = 200
+    ai_fix_cache_path: str = "./cache_data/ai_fix_cache.sqlite3"
+    ai_fix_cache_ttl_seconds: int = 7 * 24 * 3600
 
     # ── RAG / Vector Store ──
     embedding_model: str = "text-embedding-3-small"
@@ -61,9 +68,10 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-    @property
+    @computed_field
+    @cached_property
     def cors_origins_list(self) -> list[str]:
-        """Parse comma-separated CORS origins into a list."""
+        """Parse comma-separated CORS origins into a list (computed once per instance)."""
         return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
 
 
@@ -0,0 +1,40 @@
+"""
+Shared HTTP client for the analysis tools (scraper, technical checks,
+PageSpeed). One pooled client per process keeps connections alive across
+calls, so repeated requests to the same host (robots.txt, sitemap, the
+sitemap URL sample, the page itself) skip the TCP+TLS handshake, and with
+HTTP/2 available they are multiplexed on a single connection.
+
+The tools are synchronous and run in worker threads, so this is an
+httpx.Client (thread-safe), not an AsyncClient bound to one event loop.
+"""
+
+import atexit
+
+import httpx
+
+try:
+    import h2  # noqa: F401 — enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30.0)
+
+# follow_redirects matches the requests defaults the tools were written for
+_SHARED_CLIENT = httpx.Client(
+    limits=_LIMITS,
+    timeout=httpx.Timeout(15.0),
+    follow_redirects=True,
+    http2=HTTP2_AVAILABLE,
+)
+
+
+def get_shared_http_client() -> httpx.Client:
+    """Process-wide pooled HTTP client; pass a per-call timeout where needed."""
+    return _SHARED_CLIENT
+
+
+@atexit.register
+def _close_shared_client():
+    _SHARED_CLIENT.close()
@@ -12,12 +12,34 @@ Supported providers:
 """
 
 import os
+import atexit
+import asyncio
+import inspect
 import logging
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+try:
+    import h2  # noqa: F401 — enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# ── Shared HTTP connection pool ─────────────────────────────────────────────
+# One keep-alive pool for every OpenAI-compatible client, so agent calls reuse
+# TCP/TLS connections instead of paying a handshake per instance.
+_HTTPX_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=30.0)
+_HTTPX_TIMEOUT = httpx.Timeout(120.0)
+
+_SHARED_HTTPX_SYNC = httpx.Client(limits=_HTTPX_LIMITS, timeout=_HTTPX_TIMEOUT, http2=HTTP2_AVAILABLE)
+_SHARED_HTTPX_ASYNC = httpx.AsyncClient(limits=_HTTPX_LIMITS, timeout=_HTTPX_TIMEOUT, http2=HTTP2_AVAILABLE)
+
 # ── Provider → Model defaults ──────────────────────────────────────────────
 PROVIDER_DEFAULTS: Dict[str, str] = {
     "openai": "gpt-4o-mini",
@@ -51,81 +73,167 @@ PROVIDER_MODELS: Dict[str, list] = {
 }
 
 # ── Singleton cache ─────────────────────────────────────────────────────────
-_instances: Dict[str, BaseChatModel] = {}
+_instances: Dict[Tuple[str, str, bool], BaseChatModel] = {}
+
+# Most recent (key, instance): every agent in a request asks for the same one.
+# One tuple, replaced in a single assignment, so concurrent callers never see
+# a key paired with another key's instance.
+_last: Optional[Tuple[Tuple[str, str, bool], BaseChatModel]] = None
+
+# Env var snapshot, cleared by set_provider() / reset_llm_instances()
+_env_cache: Dict[str, Optional[str]] = {}
+# Numeric env values, parsed once alongside the snapshot
+_env_num_cache: Dict[str, Any] = {}
+
+
+def _cached_env(key: str, default: Optional[str] = None) -> Optional[str]:
+    """os.getenv(key, default), memoized until the next reset."""
+    try:
+        return _env_cache[key]
+    except KeyError:
+        value = _env_cache[key] = os.getenv(key, default)
+        return value
+
+
+def _cached_float(key: str, default: str) -> float:
+    """float(os.getenv(key, default)), memoized until the next reset."""
+    try:
+        return _env_num_cache[key]
+    except KeyError:
+        value = _env_num_cache[key] = float(_cached_env(key, default))
+        return value
 
 
+def _cached_int(key: str, default: str) -> int:
+    """int(os.getenv(key, default)), memoized until the next reset."""
+    try:
+        return _env_num_cache[key]
+    except KeyError:
+        value = _env_num_cache[key] = int(_cached_env(key, default))
+        return value
+
+
+@lru_cache(maxsize=8)
 def _resolve_provider() -> str:
     """Return the active provider name from LLM_PROVIDER env var."""
-    return os.getenv("LLM_PROVIDER", "openai").lower().strip()
+    return _cached_env("LLM_PROVIDER", "openai").lower().strip()
 
 
+@lru_cache(maxsize=8)
 def _resolve_model(provider: str) -> str:
     """Return the active model name from LLM_MODEL env var or provider default."""
-    explicit = os.getenv("LLM_MODEL", "").strip()
+    explicit = _cached_env("LLM_MODEL", "").strip()
     if explicit:
         return explicit
     return PROVIDER_DEFAULTS.get(provider, "gpt-4o-mini")
 
 
-def _build_llm(provider: str, model: str, streaming: bool) -> BaseChatModel:
-    """Instantiate the correct LangChain chat model for the given provider."""
-    temperature = float(os.getenv("LLM_TEMPERATURE", "0"))
+# ── Provider builders ───────────────────────────────────────────────────────
+# Each _load_* imports its LangChain package once and returns a
+# (model, temperature, streaming) -> BaseChatModel builder with the class bound.
+LLMBuilder = Callable[[str, float, bool], BaseChatModel]
 
-    if provider == "openai":
-        from langchain_openai import ChatOpenAI
+
+def _load_openai() -> LLMBuilder:
+    from langchain_openai import ChatOpenAI
+
+    def build(model: str, temperature: float, streaming: bool) -> BaseChatModel:
         return ChatOpenAI(
             model=model,
             temperature=temperature,
-            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            openai_api_key=_cached_env("OPENAI_API_KEY"),
             streaming=streaming,
+            http_client=_SHARED_HTTPX_SYNC,
+            http_async_client=_SHARED_HTTPX_ASYNC,
         )
+    return build
 
-    elif provider == "anthropic":
-        from langchain_anthropic import ChatAnthropic
+
+def _load_anthropic() -> LLMBuilder:
+    from langchain_anthropic import ChatAnthropic
+
+    def build(model: str, temperature: float, streaming: bool) -> BaseChatModel:
         return ChatAnthropic(
             model=model,
             temperature=temperature,
-            anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
+            anthropic_api_key=_cached_env("ANTHROPIC_API_KEY"),
             streaming=streaming,
-            max_tokens=int(os.getenv("LLM_MAX_TOKENS", "4096")),
+            max_tokens=_cached_int("LLM_MAX_TOKENS", "4096"),
         )
+    return build
 
-    elif provider == "mistral":
-        from langchain_mistralai import ChatMistralAI
+
+def _load_mistral() -> LLMBuilder:
+    from langchain_mistralai import ChatMistralAI
+
+    def build(model: str, temperature: float, streaming: bool) -> BaseChatModel:
         return ChatMistralAI(
             model=model,
             temperature=temperature,
-            mistral_api_key=os.getenv("MISTRAL_API_KEY"),
+            mistral_api_key=_cached_env("MISTRAL_API_KEY"),
             streaming=streaming,
         )
+    return build
 
-    elif provider == "ollama":
-        from langchain_ollama import ChatOllama
-        base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+def _load_ollama() -> LLMBuilder:
+    from langchain_ollama import ChatOllama
+
+    def build(model: str, temperature: float, streaming: bool) -> BaseChatModel:
         return ChatOllama(
             model=model,
             temperature=temperature,
-            base_url=base_url,
+            base_url=_cached_env("OLLAMA_BASE_URL", "http://localhost:11434"),
             streaming=streaming,
         )
+    return build
 
-    elif provider == "lmstudio":
-        # LM Studio uses OpenAI-compatible API on localhost:1234
-        from langchain_openai import ChatOpenAI
-        base_url = os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234/v1")
+
+def _load_lmstudio() -> LLMBuilder:
+    # LM Studio uses OpenAI-compatible API on localhost:1234
+    from langchain_openai import ChatOpenAI
+
+    def build(model: str, temperature: float, streaming: bool) -> BaseChatModel:
         return ChatOpenAI(
             model=model,
             temperature=temperature,
-            base_url=base_url,
+            base_url=_cached_env("LMSTUDIO_BASE_URL", "http://localhost:1234/v1"),
             api_key="lm-studio",  # LM Studio doesn't require real API key
             streaming=streaming,
+            http_client=_SHARED_HTTPX_SYNC,
+            http_async_client=_SHARED_HTTPX_ASYNC,
         )
+    return build
 
-    else:
-        raise ValueError(
-            f"Unsupported LLM provider: '{provider}'. "
-            f"Supported: {', '.join(PROVIDER_DEFAULTS.keys())}"
-        )
+
+_BUILDER_LOADERS: Dict[str, Callable[[], LLMBuilder]] = {
+    "openai": _load_openai,
+    "anthropic": _load_anthropic,
+    "mistral": _load_mistral,
+    "ollama": _load_ollama,
+    "lmstudio": _load_lmstudio,
+}
+
+# Populated on first use of each provider
+_BUILDERS: Dict[str, LLMBuilder] = {}
+
+
+def _build_llm(provider: str, model: str, streaming: bool) -> BaseChatModel:
+    """Instantiate the correct LangChain chat model for the given provider."""
+    temperature = _cached_float("LLM_TEMPERATURE", "0")
+
+    try:
+        builder = _BUILDERS[provider]
+    except KeyError:
+        loader = _BUILDER_LOADERS.get(provider)
+        if loader is None:
+            raise ValueError(
+                f"Unsupported LLM provider: '{provider}'. "
+                f"Supported: {', '.join(PROVIDER_DEFAULTS.keys())}"
+            )
+        builder = _BUILDERS[provider] = loader()
+
+    return builder(model, temperature, streaming)
 
 
 def get_shared_llm(streaming: bool = False) -> BaseChatModel:
@@ -142,15 +250,113 @@ def get_shared_llm(streaming: bool = False) -> BaseChatModel:
         LLM_PROVIDER  – openai | anthropic | mistral | ollama | lmstudio  (default: openai)
         LLM_MODEL     – model name (auto-detected per provider if omitted)
     """
+    global _last
     provider = _resolve_provider()
     model = _resolve_model(provider)
-    cache_key = f"{provider}:{model}:stream={streaming}"
+    cache_key = (provider, model, streaming)
 
-    if cache_key not in _instances:
+    last = _last
+    if last is not None and last[0] == cache_key:
+        return last[1]
+
+    instance = _instances.get(cache_key)
+    if instance is None:
         logger.info("Creating LLM instance: provider=%s model=%s streaming=%s", provider, model, streaming)
-        _instances[cache_key] = _build_llm(provider, model, streaming)
+        instance = _instances[cache_key] = _build_llm(provider, model, streaming)
+
+    _last = (cache_key, instance)
+    return instance
+
+
+def cacheable_system_message(content: str) -> SystemMessage:
+    """
+    SystemMessage for a static prompt prefix that repeats across calls.
+
+    On Anthropic the block is marked with cache_control, so repeated calls
+    read the prefix from the prompt cache instead of reprocessing it.
+    OpenAI-compatible servers cache identical prefixes on their own, so
+    other providers get plain string content. Messages are built once per
+    (content, provider) and reused.
+    """
+    return _system_message(content, _resolve_provider())
+
+
+@lru_cache(maxsize=32)
+def _system_message(content: str, provider: str) -> SystemMessage:
+    if provider == "anthropic":
+        return SystemMessage(content=[
+            {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+        ])
+    return SystemMessage(content=content)
+
 
-    return _instances[cache_key]
+def _probe_target(provider: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Cheap (url, headers) endpoint to check a provider is reachable, if any."""
+    if provider == "openai":
+        return "https://api.openai.com/v1/models", {"Authorization": f"Bearer {_cached_env('OPENAI_API_KEY') or ''}"}
+    elif provider == "anthropic":
+        return "https://api.anthropic.com/v1/models", {
+            "x-api-key": _cached_env("ANTHROPIC_API_KEY") or "",
+            "anthropic-version": "2023-06-01",
+        }
+    elif provider == "mistral":
+        return "https://api.mistral.ai/v1/models", {"Authorization": f"Bearer {_cached_env('MISTRAL_API_KEY') or ''}"}
+    elif provider == "ollama":
+        return _cached_env("OLLAMA_BASE_URL", "http://localhost:11434"), {}
+    elif provider == "lmstudio":
+        return _cached_env("LMSTUDIO_BASE_URL", "http://localhost:1234/v1").rstrip("/") + "/models", {}
+    return None
+
+
+async def awarm_up_llm() -> None:
+    """
+    Build the streaming and non-streaming LLM singletons and open keep-alive
+    connections to the provider on both shared HTTP pools, so the first user
+    request doesn't pay the TCP+TLS handshake. Best-effort; errors are ignored.
+    """
+    get_shared_llm(streaming=False)
+    get_shared_llm(streaming=True)
+
+    provider = _resolve_provider()
+    # Only providers on the shared pools benefit from warming them
+    target = _probe_target(provider) if provider in ("openai", "lmstudio") else None
+    if target is None:
+        return
+    url, headers = target
+
+    results = await asyncio.gather(
+        asyncio.to_thread(_SHARED_HTTPX_SYNC.head, url, headers=headers),
+        _SHARED_HTTPX_ASYNC.head(url, headers=headers),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.debug("LLM connection warm-up failed: %s", result)
+
+
+# Per-provider kwargs that cap a warm-up reply at one token
+_ONE_TOKEN_KWARGS: Dict[str, Dict[str, int]] = {"ollama": {"num_predict": 1}}
+
+
+async def awarm_up_prompts(prefixes: Iterable[List[BaseMessage]]) -> None:
+    """
+    Send each static prompt prefix once with a trivial user turn, so the
+    provider's prefix/KV cache already holds it when the first real request
+    arrives (Anthropic via cache_control, OpenAI and local servers such as
+    vLLM, LM Studio and Ollama via automatic prefix caching).
+
+    Prefixes must be the exact messages the real calls start with. Replies
+    are capped at one token. Best-effort; errors are ignored.
+    """
+    provider = _resolve_provider()
+    llm = get_shared_llm().bind(**_ONE_TOKEN_KWARGS.get(provider, {"max_tokens": 1}))
+    results = await asyncio.gather(
+        *(llm.ainvoke([*prefix, HumanMessage(content="ping")]) for prefix in prefixes),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.debug("Prompt warm-up failed: %s", result)
 
 
 def set_provider(provider: str, model: Optional[str] = None) -> Dict[str, str]:
@@ -200,14 +406,42 @@ def get_current_provider_info() -> Dict[str, Any]:
     }
 
 
+async def aget_current_provider_info(timeout: float = 3.0) -> Dict[str, Any]:
+    """
+    get_current_provider_info() plus a live "reachable" flag per provider:
+    one HEAD per provider that has credentials, all sent concurrently on the
+    shared async pool, so the whole check costs about one round-trip.
+    A provider is reachable if its endpoint answers with status < 500;
+    "configured" keeps its meaning (credentials present).
+    """
+    info = get_current_provider_info()
+    for entry in info["providers"].values():
+        entry["reachable"] = False
+    names = [name for name, entry in info["providers"].items() if entry["configured"]]
+
+    async def probe(name: str) -> bool:
+        target = _probe_target(name)
+        if target is None:
+            return False
+        url, headers = target
+        response = await _SHARED_HTTPX_ASYNC.head(url, headers=headers, timeout=timeout)
+        return response.status_code < 500
+
+    results = await asyncio.gather(*(probe(name) for name in names), return_exceptions=True)
+    for name, result in zip(names, results):
+        info["providers"][name]["reachable"] = result is True
+    return info
+
+
+@lru_cache(maxsize=8)
 def _is_provider_configured(provider: str) -> bool:
     """Check if the required API key / service is available for a provider."""
     if provider == "openai":
-        return bool(os.getenv("OPENAI_API_KEY"))
+        return bool(_cached_env("OPENAI_API_KEY"))
     elif provider == "anthropic":
-        return bool(os.getenv("ANTHROPIC_API_KEY"))
+        return bool(_cached_env("ANTHROPIC_API_KEY"))
     elif provider == "mistral":
-        return bool(os.getenv("MISTRAL_API_KEY"))
+        return bool(_cached_env("MISTRAL_API_KEY"))
     elif provider == "ollama":
         # Ollama is local — always "configured" if env allows it
         return True
@@ -217,9 +451,55 @@ def _is_provider_configured(provider: str) -> bool:
     return False
 
 
+# Providers whose clients are pooled process-wide and must not be closed per
+# instance: openai/lmstudio use _SHARED_HTTPX_*, langchain_anthropic keeps its
+# own lru_cached httpx client shared by every ChatAnthropic
+_POOLED_PROVIDERS = frozenset({"openai", "lmstudio", "anthropic"})
+
+
+def _close_instance(provider: str, instance: BaseChatModel) -> None:
+    """
+    Close the private HTTP clients held by an LLM instance (Mistral, Ollama).
+    Only clients already created are touched — lazily built ones are
+    read from the instance dict so they aren't instantiated just to be closed.
+    Async clients can't be closed from sync code and are left to the GC.
+    """
+    if provider in _POOLED_PROVIDERS:
+        return
+    for attr in ("client", "_client"):
+        client = vars(instance).get(attr)
+        close = getattr(client, "close", None)
+        if callable(close) and not inspect.iscoroutinefunction(close):
+            try:
+                close()
+            except Exception as e:
+                logger.debug("Failed to close %s client: %s", provider, e)
+
+
 def reset_llm_instances():
     """
     Reset all cached LLM instances (useful for testing or changing models at runtime).
+    Private HTTP clients are closed so repeated provider switches don't leak sockets.
     """
-    global _instances
+    global _last
+    for (provider, _, _), instance in _instances.items():
+        _close_instance(provider, instance)
     _instances.clear()
+    _env_cache.clear()
+    _env_num_cache.clear()
+    _resolve_provider.cache_clear()
+    _resolve_model.cache_clear()
+    _is_provider_configured.cache_clear()
+    _system_message.cache_clear()
+    _last = None
+
+
+@atexit.register
+def _cleanup():
+    """Close cached LLM clients and the shared HTTP pools on interpreter exit."""
+    reset_llm_instances()
+    _SHARED_HTTPX_SYNC.close()
+    try:
+        asyncio.run(_SHARED_HTTPX_ASYNC.aclose())
+    except Exception as e:
+        logger.debug("Failed to close shared async HTTP pool: %s", e)
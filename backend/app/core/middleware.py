@@ -0,0 +1,60 @@
+"""
+ASGI middleware for SEO Agent Pro.
+Kept as raw ASGI callables so they run before FastAPI routing.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+
+class CORSPreflightMiddleware:
+    """
+    Answer every OPTIONS request directly with prebuilt CORS headers,
+    without going through routing or building a Response object.
+
+    The request Origin is echoed back when it is allowed; otherwise the
+    first configured origin is used (same behaviour as the old catch-all
+    OPTIONS route).
+    """
+
+    def __init__(
+        self,
+        app,
+        allow_origins: Sequence[str],
+        allow_methods: Sequence[str] = ("GET", "POST", "OPTIONS"),
+        allow_headers: Sequence[str] = ("Content-Type", "Authorization"),
+        allow_credentials: bool = True,
+    ):
+        self.app = app
+
+        common: List[Tuple[bytes, bytes]] = [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode()),
+            (b"access-control-allow-headers", ", ".join(allow_headers).encode()),
+            (b"vary", b"Origin"),
+            (b"content-length", b"0"),
+        ]
+        if allow_credentials:
+            common.append((b"access-control-allow-credentials", b"true"))
+
+        # Header lists are built once per allowed origin at startup
+        self._headers_by_origin: Dict[bytes, List[Tuple[bytes, bytes]]] = {
+            origin.encode(): [(b"access-control-allow-origin", origin.encode()), *common]
+            for origin in allow_origins
+        }
+        default_origin = allow_origins[0].encode() if allow_origins else b""
+        self._default_headers = self._headers_by_origin.get(
+            default_origin, [(b"access-control-allow-origin", default_origin), *common]
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        headers = self._default_headers
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                headers = self._headers_by_origin.get(value, self._default_headers)
+                break
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
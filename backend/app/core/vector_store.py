@@ -1,21 +1,36 @@
 """
 Singleton Vector Store Manager
-Manages ChromaDB persistent client and OpenAI embeddings.
+Manages ChromaDB persistent client and embeddings (OpenAI or local SBERT).
 All modules should use get_vector_store() / get_embeddings() instead of creating new instances.
+
+Embedding backend is selected with EMBEDDING_BACKEND:
+  - openai → OpenAIEmbeddings (EMBEDDING_MODEL, default text-embedding-3-small)
+  - local  → sentence-transformers on CPU (LOCAL_EMBEDDING_MODEL, int8 ONNX if available)
 """
 
 import os
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
 import chromadb
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 _chroma_client: Optional[chromadb.ClientAPI] = None
-_embeddings_instance: Optional[OpenAIEmbeddings] = None
+_embeddings_instance: Optional[Embeddings] = None
+_collections: Dict[str, chromadb.Collection] = {}
+
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+LOCAL_EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"
 
 # Persistent storage directory (relative to backend/)
 CHROMA_PERSIST_DIR = str(Path(__file__).resolve().parent.parent.parent / "chroma_data")
@@ -34,36 +49,116 @@ def get_chroma_client() -> chromadb.ClientAPI:
     return _chroma_client
 
 
-def get_embeddings() -> OpenAIEmbeddings:
+class LocalEmbeddings(Embeddings):
     """
-    Get the singleton OpenAI Embeddings instance.
-    Uses text-embedding-3-small for best cost/performance balance.
+    LangChain Embeddings backed by a local sentence-transformers model.
+    Loads the int8-quantized ONNX export when available (falls back to the
+    default backend otherwise); no network calls after the first download.
+    """
+
+    def __init__(self, model: str = LOCAL_EMBEDDING_MODEL, onnx_file: Optional[str] = LOCAL_EMBEDDING_ONNX_FILE):
+        self.model = model
+        try:
+            if not onnx_file:
+                raise ValueError("no ONNX file configured")
+            self._encoder = SentenceTransformer(model, backend="onnx", model_kwargs={"file_name": onnx_file})
+        except Exception as e:
+            logger.info("Quantized ONNX model unavailable (%s), loading %s with default backend", e, model)
+            self._encoder = SentenceTransformer(model)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self._encoder.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+def _embedding_backend() -> str:
+    """Active embedding backend: "local" only if requested and installed."""
+    backend = os.getenv("EMBEDDING_BACKEND", "openai").lower().strip()
+    if backend == "local" and not SENTENCE_TRANSFORMERS_AVAILABLE:
+        logger.warning("EMBEDDING_BACKEND=local but sentence-transformers is not installed; using OpenAI")
+        return "openai"
+    return backend
+
+
+def get_embeddings() -> Embeddings:
+    """
+    Get the singleton Embeddings instance.
+    OpenAI (text-embedding-3-small) by default; EMBEDDING_BACKEND=local
+    embeds on CPU with a quantized SBERT model instead.
     """
     global _embeddings_instance
     if _embeddings_instance is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-        _embeddings_instance = OpenAIEmbeddings(
-            model=model,
-            openai_api_key=api_key,
-        )
-        logger.info("OpenAI Embeddings initialized with model=%s", model)
+        if _embedding_backend() == "local":
+            model = os.getenv("LOCAL_EMBEDDING_MODEL", LOCAL_EMBEDDING_MODEL)
+            onnx_file = os.getenv("LOCAL_EMBEDDING_ONNX_FILE", LOCAL_EMBEDDING_ONNX_FILE)
+            _embeddings_instance = LocalEmbeddings(model=model, onnx_file=onnx_file)
+            logger.info("Local embeddings initialized with model=%s", model)
+        else:
+            api_key = os.getenv("OPENAI_API_KEY")
+            model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+            _embeddings_instance = OpenAIEmbeddings(
+                model=model,
+                openai_api_key=api_key,
+            )
+            logger.info("OpenAI Embeddings initialized with model=%s", model)
     return _embeddings_instance
 
 
-def get_collection(name: str) -> chromadb.Collection:
+def _hnsw_metadata(expected_size: Optional[int]) -> Dict[str, object]:
+    """
+    HNSW build/search params for a collection of roughly expected_size vectors.
+    Chroma only applies these when the collection is created.
+    """
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": 32 if (expected_size or 0) > 50_000 else 16,
+        "hnsw:construction_ef": 200,
+        "hnsw:search_ef": 64,
+    }
+
+
+def get_collection(name: str, expected_size: Optional[int] = None) -> chromadb.Collection:
     """
     Get or create a named ChromaDB collection.
+    Handles are cached per name so hot RAG paths skip the get_or_create round-trip.
+    expected_size tunes HNSW graph degree for new collections (ignored for existing ones).
     """
-    client = get_chroma_client()
-    return client.get_or_create_collection(
-        name=name,
-        metadata={"hnsw:space": "cosine"},
-    )
+    collection = _collections.get(name)
+    if collection is None:
+        client = get_chroma_client()
+        # Local and OpenAI vectors differ in dimension, so keep them in separate collections
+        collection_name = f"{name}_local" if _embedding_backend() == "local" else name
+        collection = client.get_or_create_collection(
+            name=collection_name,
+            metadata=_hnsw_metadata(expected_size),
+        )
+        _collections[name] = collection
+    return collection
 
 
 def reset_vector_store():
-    """Reset all singleton instances (for testing)."""
+    """
+    Reset all singleton instances (for testing).
+    Closes the OpenAI embeddings HTTP client; the Chroma client is only
+    dropped — client.reset() would wipe the persisted data.
+    """
     global _chroma_client, _embeddings_instance
+    root_client = getattr(getattr(_embeddings_instance, "client", None), "_client", None)
+    if root_client is not None and hasattr(root_client, "close"):
+        try:
+            root_client.close()
+        except Exception as e:
+            logger.debug("Failed to close embeddings client: %s", e)
     _chroma_client = None
     _embeddings_instance = None
+    _collections.clear()
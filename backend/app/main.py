@@ -7,6 +7,8 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load .env BEFORE any module imports so API keys are available at import time
@@ -14,14 +16,15 @@ env_path = backend_dir / ".env"
 load_dotenv(env_path)
 
 from fastapi import FastAPI, Request
-from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional
 from app.routes.scan import router as scan_router
 from app.routes.scan_full import router as scan_full_router
 from app.routes.graph_scan import router as graph_scan_router
 from app.routes.chat import router as chat_router
-from app.core.llm_factory import get_current_provider_info, set_provider
+from app.core.llm_factory import aget_current_provider_info, get_current_provider_info, set_provider
+from app.core.config import get_settings
+from app.core.middleware import CORSPreflightMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -40,27 +43,34 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # CORS middleware — restrict to known frontend origins
-_cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[o.strip() for o in _cors_origins],
+    allow_origins=get_settings().cors_origins_list,
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Preflight short-circuit — added last so it is outermost and answers
+# OPTIONS before CORSMiddleware and routing run
+app.add_middleware(
+    CORSPreflightMiddleware,
+    allow_origins=get_settings().cors_origins_list,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+)
+
 app.include_router(scan_router, prefix="/api")
 app.include_router(scan_full_router, prefix="/api")
 app.include_router(graph_scan_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Index the SEO knowledge base on startup (idempotent)."""
+async def _index_knowledge_base():
+    """Index the SEO knowledge base (idempotent); runs as a background task."""
     try:
-        from app.core.knowledge_indexer import index_knowledge_base
-        count = index_knowledge_base()
+        from app.core.knowledge_indexer import aindex_knowledge_base
+        count = await aindex_knowledge_base()
         import logging
         logging.getLogger(__name__).info("Knowledge base ready: %d documents", count)
     except Exception as e:
@@ -68,6 +78,58 @@ async def startup_event():
         logging.getLogger(__name__).warning("Knowledge base indexing skipped: %s", e)
 
 
+async def _warm_up_connections():
+    """Pre-build the LLM/embedding singletons and open provider connections."""
+    try:
+        from app.core.llm_factory import awarm_up_llm
+        from app.core.vector_store import get_embeddings
+        await asyncio.gather(awarm_up_llm(), asyncio.to_thread(get_embeddings))
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).warning("Connection warm-up skipped: %s", e)
+
+    if get_settings().llm_prompt_warmup:
+        await _warm_up_prompts()
+
+
+async def _warm_up_prompts():
+    """Prefill the provider's prompt cache with the long static system prompts."""
+    try:
+        from app.core.llm_factory import awarm_up_prompts, cacheable_system_message
+        from app.modules.agents.react_orchestrator import ReActOrchestrator
+        from app.modules.ai_fix_agents import AUTOFIX_SYSTEM_PROMPT, FIX_PROMPT, FIX_SUGGESTIONS_SYSTEM_PROMPT
+        from app.modules.ai_content_expander import EXPAND_PROMPT
+        from app.modules.ai_roadmap_agent import ROADMAP_SYSTEM_PROMPT
+        from app.modules.ai_schema_agent import SCHEMA_SYSTEM_PROMPT
+
+        await awarm_up_prompts([
+            [cacheable_system_message(ReActOrchestrator.REACT_SYSTEM_PROMPT)],
+            [FIX_PROMPT.messages[0].format()],
+            [EXPAND_PROMPT.messages[0].format()],
+            [cacheable_system_message(AUTOFIX_SYSTEM_PROMPT)],
+            [cacheable_system_message(FIX_SUGGESTIONS_SYSTEM_PROMPT)],
+            [cacheable_system_message(ROADMAP_SYSTEM_PROMPT)],
+            [cacheable_system_message(SCHEMA_SYSTEM_PROMPT)],
+        ])
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).warning("Prompt warm-up skipped: %s", e)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Size the default executor, then index the knowledge base and warm up connections in the background."""
+    settings = get_settings()
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.thread_pool_size)
+    )
+
+    # Don't hold up readiness on embedding + upsert; RAG lookups return []
+    # until KB_READY is set. Keep a reference so the task isn't collected.
+    app.state.kb_index_task = asyncio.create_task(_index_knowledge_base())
+    app.state.warmup_task = asyncio.create_task(_warm_up_connections())
+
+
 @app.get("/api/health")
 async def health():
     """Detailed health check endpoint."""
@@ -81,6 +143,8 @@ async def health():
     except Exception:
         rag_status = "unavailable"
 
+    from app.core.knowledge_indexer import KB_READY
+
     llm_info = get_current_provider_info()
     return {
         "status": "ok",
@@ -92,6 +156,29 @@ async def health():
         "mistral_configured": bool(os.getenv("MISTRAL_API_KEY")),
         "tavily_configured": bool(os.getenv("TAVILY_API_KEY")),
         "rag_status": rag_status,
+        "knowledge_base_ready": KB_READY.is_set(),
+    }
+
+
+@app.get("/api/health/providers")
+async def health_providers():
+    """
+    LLM provider reachability: one live probe per provider with credentials,
+    sent concurrently. Kept off /api/health so liveness checks stay cheap
+    and offline.
+    """
+    return await aget_current_provider_info()
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Cache hit/miss counters, for sizing cache_max_size from real traffic."""
+    from app.core.cache_manager import cache_stats, llm_cache_stats
+    from app.core.knowledge_indexer import query_cache_stats
+    return {
+        "fixes_cache": cache_stats(),
+        "llm_response_cache": llm_cache_stats(),
+        "knowledge_query_cache": query_cache_stats(),
     }
 
 
@@ -117,16 +204,3 @@ async def update_llm_config(req: LLMConfigRequest):
     except ValueError as e:
         from fastapi import HTTPException
         raise HTTPException(status_code=400, detail=str(e))
-
-# Catch-all OPTIONS for preflight CORS requests
-@app.options("/{full_path:path}")
-async def options_handler(full_path: str):
-    origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000")
-    return Response(
-        status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": origins.split(",")[0].strip(),
-            "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-        }
-    )
\ No newline at end of file
@@ -3,12 +3,13 @@ SEO-PRO Agents Module
 AI-powered agents for SEO analysis and recommendations.
 """
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, ExpectedAgentError
 from .authority_agent import AuthorityAgent
 from .keyword_agent import KeywordAgent
 
 __all__ = [
     "BaseAgent",
+    "ExpectedAgentError",
     "AuthorityAgent",
     "KeywordAgent"
 ]
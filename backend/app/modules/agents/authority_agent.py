@@ -3,13 +3,42 @@ Authority Agent - Domain Authority Analysis with AI Insights
 Analyzes site authority and provides competitive intelligence.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from .base_agent import BaseAgent
-from langchain_core.prompts import ChatPromptTemplate
+from app.core.cache_manager import DirectMappedCache
+from langchain_core.messages import HumanMessage, SystemMessage
+import re
 
 
-AUTHORITY_PROMPT = ChatPromptTemplate.from_messages([
-    ("system", """Sei un esperto di Domain Authority, Link Building e SEO Off-Page.
+# Whitespace-delimited words, same tokens as str.split()
+_WORD_RE = re.compile(r"\S+")
+
+# Numbered ("1." / "1)") or bulleted ("-") recommendation lines in LLM output
+_REC_RE = re.compile(r"^[ \t]*(?:\d+[.)]|-)[ \t]*(.+?)[ \t\r]*$", re.MULTILINE)
+
+# LLM recommendations keyed by bucketed metrics, so re-scans of the same
+# site/competitor pair (small metric drift) reuse the previous response
+_LLM_CACHE_SIZE = 256
+_llm_cache = DirectMappedCache(size=_LLM_CACHE_SIZE)
+
+
+def _recommendations_cache_key(analysis: Dict[str, Any]) -> str:
+    """Bucket the prompt inputs so near-identical analyses share a cache slot."""
+    get = analysis.get
+    return "%d:%d:%d:%d:%d:%d:%d:%d" % (
+        (get("your_authority") or 0) // 5,
+        (get("competitor_authority") or 0) // 5,
+        get("your_backlinks", 0) // 10,
+        get("competitor_backlinks", 0) // 10,
+        get("your_content_score", 0) // 5,
+        get("competitor_content_score", 0) // 5,
+        get("your_social", 0),
+        get("competitor_social", 0),
+    )
+
+
+# Static system message built once; only the user turn is formatted per call
+AUTHORITY_SYSTEM_MSG = SystemMessage(content="""Sei un esperto di Domain Authority, Link Building e SEO Off-Page.
     
     Analizza i dati forniti e:
     1. Spiega PERCHÉ un sito ha più/meno authority dell'altro
@@ -32,8 +61,9 @@ AUTHORITY_PROMPT = ChatPromptTemplate.from_messages([
     1. [Azione specifica con timeline]
     2. [Azione specifica con timeline]
     3. [Azione specifica con timeline]
-    """),
-    ("user", """
+    """)
+
+AUTHORITY_USER_TEMPLATE = """
     **IL TUO SITO:**
     - Authority Score: {your_authority}
     - Backlinks Stimati: {your_backlinks}
@@ -49,8 +79,7 @@ AUTHORITY_PROMPT = ChatPromptTemplate.from_messages([
     **GAP:** {gap} punti (competitor vince di {gap_percent}%)
     
     Analizza e genera raccomandazioni.
-    """)
-])
+    """
 
 
 class AuthorityAgent(BaseAgent):
@@ -67,6 +96,8 @@ class AuthorityAgent(BaseAgent):
         - recommendations: Actionable steps to improve
     """
     
+    __slots__ = ()
+    
     def analyze(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calculate authority metrics using existing engine.
@@ -80,17 +111,13 @@ class AuthorityAgent(BaseAgent):
         authority_data = run_authority_engine(your_scan, competitor_scan)
         
         # Enrich with additional metrics
-        your_backlinks = self._estimate_backlinks(your_scan)
-        your_social = self._count_social_signals(your_scan)
-        your_content = self._estimate_content_score(your_scan)
+        your_backlinks, your_social, your_content = self._extract_metrics(your_scan)
         
         comp_backlinks = 0
         comp_social = 0
         comp_content = 0
         if competitor_scan:
-            comp_backlinks = self._estimate_backlinks(competitor_scan)
-            comp_social = self._count_social_signals(competitor_scan)
-            comp_content = self._estimate_content_score(competitor_scan)
+            comp_backlinks, comp_social, comp_content = self._extract_metrics(competitor_scan)
         
         authority_data["your_backlinks"] = your_backlinks
         authority_data["your_social"] = your_social
@@ -105,91 +132,110 @@ class AuthorityAgent(BaseAgent):
         """
         Use LLM to generate strategic authority-building recommendations.
         """
-        your_auth = analysis.get("your_authority") or 0
-        comp_auth = analysis.get("competitor_authority") or 0
-        
-        gap = comp_auth - your_auth
-        gap_percent = int((gap / max(1, comp_auth)) * 100) if comp_auth > 0 else 0
+        messages = self._build_messages(analysis)
         
         # If no competitor or no gap, return default recommendations
-        if gap <= 0 or comp_auth == 0:
-            return self._default_recommendations(your_auth)
+        if messages is None:
+            return self._default_recommendations(analysis.get("your_authority") or 0)
         
-        # Prepare LLM prompt
-        messages = AUTHORITY_PROMPT.format_messages(
-            your_authority=your_auth,
-            your_backlinks=analysis.get("your_backlinks", 0),
-            your_content=analysis.get("your_content_score", 0),
-            your_social=analysis.get("your_social", 0),
-            comp_authority=comp_auth,
-            comp_backlinks=analysis.get("competitor_backlinks", 0),
-            comp_content=analysis.get("competitor_content_score", 0),
-            comp_social=analysis.get("competitor_social", 0),
-            gap=gap,
-            gap_percent=gap_percent
-        )
+        cache_key = _recommendations_cache_key(analysis)
+        cached = _llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Get LLM insights
-        result = self.llm.invoke(messages)
+        content = self._invoke_llm(messages)
         
         # Parse recommendations from LLM output
-        recommendations = self._parse_llm_recommendations(result.content)
-        
+        recommendations = self._parse_llm_recommendations(content)
+        _llm_cache.set(cache_key, recommendations)
         return recommendations
     
-    def _estimate_backlinks(self, scan: Dict) -> int:
+    async def agenerate_recommendations(self, analysis: Dict[str, Any]) -> list:
         """
-        Estimate backlinks from external link count (proxy metric).
+        Async variant of generate_recommendations() using llm.ainvoke, so the
+        LLM round-trip can overlap with other agents via asyncio.gather.
         """
-        links = scan.get("links", [])
-        external = sum(1 for l in links if isinstance(l, dict) and not l.get("internal", True))
-        # Multiply by factor (sites with many external links tend to have backlinks)
-        return external * 3
+        messages = self._build_messages(analysis)
+        
+        if messages is None:
+            return self._default_recommendations(analysis.get("your_authority") or 0)
+        
+        cache_key = _recommendations_cache_key(analysis)
+        cached = _llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        content = await self._ainvoke_llm(messages)
+        recommendations = self._parse_llm_recommendations(content)
+        _llm_cache.set(cache_key, recommendations)
+        return recommendations
     
-    def _count_social_signals(self, scan: Dict) -> int:
+    def _build_messages(self, analysis: Dict[str, Any]) -> Optional[list]:
         """
-        Count social media presence.
+        Build the gap-analysis prompt, or return None when there is no
+        competitor gap to explain.
         """
-        social_links = scan.get("social_links", [])
-        return len(social_links) if isinstance(social_links, list) else 0
+        get = analysis.get
+        your_auth = get("your_authority") or 0
+        comp_auth = get("competitor_authority") or 0
+        
+        gap = comp_auth - your_auth
+        if gap <= 0 or comp_auth == 0:
+            return None
+        gap_percent = int((gap / max(1, comp_auth)) * 100)
+        
+        user_msg = AUTHORITY_USER_TEMPLATE.format(
+            your_authority=your_auth,
+            your_backlinks=get("your_backlinks", 0),
+            your_content=get("your_content_score", 0),
+            your_social=get("your_social", 0),
+            comp_authority=comp_auth,
+            comp_backlinks=get("competitor_backlinks", 0),
+            comp_content=get("competitor_content_score", 0),
+            comp_social=get("competitor_social", 0),
+            gap=gap,
+            gap_percent=gap_percent
+        )
+        return [AUTHORITY_SYSTEM_MSG, HumanMessage(content=user_msg)]
     
-    def _estimate_content_score(self, scan: Dict) -> int:
+    def _extract_metrics(self, scan: Dict) -> Tuple[int, int, int]:
         """
-        Estimate content quality score (0-100).
+        Compute (backlinks, social, content_score) in one pass over the scan.
+        
+        - backlinks: external link count × 3 (proxy metric — sites with many
+          external links tend to have backlinks)
+        - social: number of social media profiles
+        - content_score: content quality estimate (0-100), 1 point per 10 words
         """
+        links = scan.get("links", [])
+        social_links = scan.get("social_links", [])
         paragraphs = scan.get("paragraphs", []) or []
-        wordcount = sum(len(p.split()) for p in paragraphs)
-        return min(100, int(wordcount / 10)) if wordcount > 0 else 0
+        
+        # The scraper always emits links as dicts, so no per-item isinstance
+        get = dict.get
+        external = sum(1 for l in links if not get(l, "internal", True))
+        
+        social = len(social_links) if isinstance(social_links, list) else 0
+        
+        # Count matches instead of building a word list per paragraph
+        wordcount = 0
+        for p in paragraphs:
+            for _ in _WORD_RE.finditer(p):
+                wordcount += 1
+        content = min(100, int(wordcount / 10)) if wordcount > 0 else 0
+        
+        return external * 3, social, content
     
     def _parse_llm_recommendations(self, llm_output: str) -> list:
         """
         Parse LLM output into structured recommendations.
         """
-        recommendations = []
-        lines = llm_output.split("\n")
-        
-        current_rec = None
-        for line in lines:
-            line = line.strip()
-            
-            # Detect numbered recommendations
-            if line and (line[0].isdigit() or line.startswith("-")):
-                if current_rec:
-                    recommendations.append(current_rec)
-                
-                # Clean line
-                cleaned = line.lstrip("0123456789.-) ").strip()
-                current_rec = {
-                    "action": cleaned,
-                    "priority": len(recommendations) + 1,
-                    "category": "authority"
-                }
-        
-        # Add last recommendation
-        if current_rec:
-            recommendations.append(current_rec)
-        
-        return recommendations[:10]  # Limit to top 10
+        matches = _REC_RE.findall(llm_output)[:10]  # Limit to top 10
+        return [
+            {"action": action, "priority": i + 1, "category": "authority"}
+            for i, action in enumerate(matches)
+        ]
     
     def _default_recommendations(self, current_authority: int) -> list:
         """
@@ -217,19 +263,23 @@ class AuthorityAgent(BaseAgent):
         """
         Format authority agent output.
         """
+        get = analysis.get
+        your_auth = get("your_authority")
+        comp_auth = get("competitor_authority")
+        
         return {
             "agent": self.name,
             "status": "success",
             "authority_scores": {
-                "your_authority": analysis.get("your_authority"),
-                "competitor_authority": analysis.get("competitor_authority"),
-                "gap": (analysis.get("competitor_authority") or 0) - (analysis.get("your_authority") or 0)
+                "your_authority": your_auth,
+                "competitor_authority": comp_auth,
+                "gap": (comp_auth or 0) - (your_auth or 0)
             },
             "metrics": {
-                "your_backlinks": analysis.get("your_backlinks", 0),
-                "competitor_backlinks": analysis.get("competitor_backlinks", 0),
-                "your_social": analysis.get("your_social", 0),
-                "competitor_social": analysis.get("competitor_social", 0)
+                "your_backlinks": get("your_backlinks", 0),
+                "competitor_backlinks": get("competitor_backlinks", 0),
+                "your_social": get("your_social", 0),
+                "competitor_social": get("competitor_social", 0)
             },
             "recommendations": recommendations,
             "full_analysis": analysis
@@ -4,13 +4,63 @@ All agents inherit from BaseAgent for consistency.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.llm_factory import get_shared_llm
+from app.core.cache_manager import DirectMappedCache, get_llm_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class ExpectedAgentError(Exception):
+    """
+    Recoverable agent failure caused by the input (e.g. missing scraped
+    data), not by a bug: reported in the agent output without a traceback.
+    """
+
+
+# Text fields of scraper output that agents match case-insensitively
+_TEXT_FIELDS = ("url", "title", "meta_description")
+_TEXT_LIST_FIELDS = ("h1", "h2", "h3", "paragraphs", "images_alt")
+
+# Lowercased views of scraped pages, shared by every agent that looks at the
+# same scrape. Keyed by object identity; each entry holds a reference to the
+# scraped dict so its id cannot be reused while cached. The view is kept out
+# of scraped_data itself because that dict is returned to the client.
+_lowered_cache = DirectMappedCache(size=32)
+
+
+def lowered_scraped(scraped: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lowercased copy of the text fields of `scraped`, plus "content_length"
+    (paragraph word count). Computed once per scraped dict.
+    
+    Types are normalized so consumers never branch on them: scalar fields
+    are always str ("" when missing) and list fields always list[str]
+    (missing/empty items dropped, non-str items converted).
+    """
+    key = str(id(scraped))
+    entry = _lowered_cache.get(key)
+    if entry is not None and entry[0] is scraped:
+        return entry[1]
+    
+    view: Dict[str, Any] = {}
+    for field in _TEXT_FIELDS:
+        value = scraped.get(field)
+        view[field] = str(value).lower() if value else ""
+    for field in _TEXT_LIST_FIELDS:
+        value = scraped.get(field) or []
+        if isinstance(value, str):
+            value = [value]
+        view[field] = [str(v).lower() for v in value if v]
+    view["content_length"] = sum(len(p.split()) for p in view["paragraphs"])
+    
+    _lowered_cache.set(key, (scraped, view))
+    return view
+
+
 class BaseAgent(ABC):
     """
     Abstract base class for all SEO agents.
@@ -21,13 +71,24 @@ class BaseAgent(ABC):
     - Standard execution flow
     - Error handling
     - Logging
+    
+    Subclasses that add no instance attributes declare `__slots__ = ()` so
+    agents created per page carry no instance __dict__.
     """
     
+    __slots__ = ("name", "_llm", "logger", "_trace", "_analysis", "_recommendations", "_logs", "_cache_stats")
+    
     def __init__(self, name: Optional[str] = None):
         self.name = name or self.__class__.__name__
-        self.llm = get_shared_llm()
-        self.state = {}
+        self._llm: Optional[BaseChatModel] = None  # resolved on first use, see llm
         self.logger = logger
+        self._analysis: Optional[Dict[str, Any]] = None
+        self._recommendations: Optional[list] = None
+        self._logs: Optional[List[Dict[str, str]]] = None
+        self._cache_stats: Optional[Dict[str, int]] = None
+        # Step logging is only worth its cost when INFO is actually emitted;
+        # otherwise execute() takes the fused path with no per-step bookkeeping
+        self._trace = self.logger.isEnabledFor(logging.INFO)
     
     @abstractmethod
     def analyze(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -65,29 +126,230 @@ class BaseAgent(ABC):
         Returns:
             Complete agent output with analysis and recommendations
         """
+        if not self._trace:
+            return self._execute_fused(data)
+        
         try:
-            self._log("start", f"Executing {self.name}")
+            self._log("start", "Executing %s", self.name)
             
             # Phase 1: Analysis
             analysis = self.analyze(data)
-            self.state["analysis"] = analysis
+            self._analysis = analysis
             self._log("analyze", "Analysis complete")
             
             # Phase 2: Recommendations
             recommendations = self.generate_recommendations(analysis)
-            self.state["recommendations"] = recommendations
-            self._log("recommendations", f"Generated {len(recommendations)} recommendations")
+            self._recommendations = recommendations
+            self._log("recommendations", "Generated %d recommendations", len(recommendations))
             
             # Phase 3: Format output
             output = self._format_output(analysis, recommendations)
-            self._log("complete", f"{self.name} execution complete")
+            self._log("complete", "%s execution complete", self.name)
             
             return output
             
         except Exception as e:
-            self._log("error", f"Agent execution failed: {str(e)}")
+            self._log("error", "Agent execution failed: %s", e)
+            return self._handle_error(e)
+    
+    async def execute_async(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async execute(): analyze() runs inline (CPU only), then the LLM step is
+        awaited via agenerate_recommendations(), so several agents can be
+        gathered on one event loop and their LLM latencies overlap.
+        """
+        try:
+            self._log("start", "Executing %s", self.name)
+            
+            analysis = self.analyze(data)
+            if self._trace:
+                self._analysis = analysis
+            self._log("analyze", "Analysis complete")
+            
+            recommendations = await self.agenerate_recommendations(analysis)
+            if self._trace:
+                self._recommendations = recommendations
+            self._log("recommendations", "Generated %d recommendations", len(recommendations))
+            
+            output = self._format_output(analysis, recommendations)
+            self._log("complete", "%s execution complete", self.name)
+            return output
+        
+        except Exception as e:
+            self._log("error", "Agent execution failed: %s", e)
+            return self._handle_error(e)
+    
+    def _execute_fused(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        execute() without step logs or intermediate state writes.
+        """
+        try:
+            analysis = self.analyze(data)
+            return self._format_output(analysis, self.generate_recommendations(analysis))
+        except Exception as e:
             return self._handle_error(e)
     
+    async def agenerate_recommendations(self, analysis: Dict[str, Any]) -> list:
+        """
+        Async variant of generate_recommendations().
+        
+        Agents that call the LLM override this with llm.ainvoke; the default
+        runs the sync implementation in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate_recommendations, analysis)
+    
+    async def execute_batch_async(
+        self,
+        data_list: List[Dict[str, Any]],
+        max_concurrency: int = 16,
+    ) -> List[Dict[str, Any]]:
+        """
+        execute() over several inputs (e.g. one per URL) with the LLM calls
+        issued concurrently instead of one after the other.
+        
+        analyze() runs first for every input (CPU only), then the
+        recommendation calls are gathered with at most `max_concurrency` in
+        flight. Outputs are returned in input order; a failing input yields
+        its own error output without affecting the others. Per-item results
+        are kept in the returned list, not in self.state.
+        
+        Args:
+            data_list: Inputs, same shape as for execute()
+            max_concurrency: Max simultaneous LLM requests
+            
+        Returns:
+            One agent output per input
+        """
+        self._log("start", "Executing %s on %d inputs", self.name, len(data_list))
+        
+        # Phase 1: Analysis
+        analyses: List[Any] = []
+        for data in data_list:
+            try:
+                analyses.append(self.analyze(data))
+            except Exception as e:
+                analyses.append(e)
+        
+        # Phase 2: Recommendations, concurrently
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _recommend(analysis: Dict[str, Any]) -> list:
+            async with semaphore:
+                return await self.agenerate_recommendations(analysis)
+        
+        pending = [i for i, a in enumerate(analyses) if not isinstance(a, Exception)]
+        results = await asyncio.gather(
+            *(_recommend(analyses[i]) for i in pending),
+            return_exceptions=True
+        )
+        recommendations: List[Any] = [None] * len(analyses)
+        for i, result in zip(pending, results):
+            recommendations[i] = result
+        
+        # Phase 3: Format output
+        outputs = []
+        for analysis, recs in zip(analyses, recommendations):
+            if isinstance(analysis, Exception):
+                outputs.append(self._handle_error(analysis))
+            elif isinstance(recs, Exception):
+                outputs.append(self._handle_error(recs))
+            else:
+                outputs.append(self._format_output(analysis, recs))
+        
+        self._log("complete", "%s batch execution complete", self.name)
+        return outputs
+    
+    def _lookup_llm_cache(self, messages: list) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Exact-match lookup in the shared LLM response cache, without calling
+        the LLM: returns (cache key, cached content or None). The key is None
+        when the cache is bypassed (see _llm_cacheable). Hit/miss counts for
+        this agent are kept in state["cache_stats"].
+        """
+        if not self._llm_cacheable():
+            return None, None
+        key = get_llm_cache().make_key(self._model_name(), messages)
+        stats = self._cache_stats
+        if stats is None:
+            stats = self._cache_stats = {"hits": 0, "misses": 0}
+        
+        content = get_llm_cache().get(key)
+        stats["hits" if content is not None else "misses"] += 1
+        return key, content
+    
+    def _complete_llm(self, messages: list, key: Optional[str]) -> str:
+        """self.llm.invoke(messages).content, stored under `key` unless it is None."""
+        content = self.llm.invoke(messages).content
+        if key is not None:
+            get_llm_cache().set(key, content)
+        return content
+    
+    async def _acomplete_llm(self, messages: list, key: Optional[str]) -> str:
+        """Async variant of _complete_llm() using self.llm.ainvoke."""
+        content = (await self.llm.ainvoke(messages)).content
+        if key is not None:
+            get_llm_cache().set(key, content)
+        return content
+    
+    def _invoke_llm(self, messages: list) -> str:
+        """
+        Return self.llm.invoke(messages).content, served from the shared LLM
+        response cache when the same model + messages were seen before.
+        The cache is bypassed unless the model is deterministic (temperature 0).
+        """
+        key, content = self._lookup_llm_cache(messages)
+        if content is not None:
+            return content
+        return self._complete_llm(messages, key)
+    
+    async def _ainvoke_llm(self, messages: list) -> str:
+        """
+        Async variant of _invoke_llm() using self.llm.ainvoke.
+        """
+        key, content = self._lookup_llm_cache(messages)
+        if content is not None:
+            return content
+        return await self._acomplete_llm(messages, key)
+    
+    @property
+    def llm(self) -> BaseChatModel:
+        """
+        Shared LLM for the active provider, fetched on first access so agents
+        that never reach the LLM (errors, cache hits, no gap) skip the lookup.
+        """
+        if self._llm is None:
+            self._llm = get_shared_llm()
+        return self._llm
+    
+    @llm.setter
+    def llm(self, value: BaseChatModel) -> None:
+        self._llm = value
+    
+    @property
+    def state(self) -> Dict[str, Any]:
+        """
+        Read-only snapshot of the agent state (analysis, recommendations,
+        logs, cache_stats), built on access from the slot fields.
+        """
+        fields = (
+            ("analysis", self._analysis),
+            ("recommendations", self._recommendations),
+            ("logs", self._logs),
+            ("cache_stats", self._cache_stats),
+        )
+        return {key: value for key, value in fields if value is not None}
+    
+    def _llm_cacheable(self) -> bool:
+        """
+        Whether self.llm responses may be cached: only at temperature 0
+        (LLM_TEMPERATURE), where the same prompt should give the same answer.
+        """
+        return getattr(self.llm, "temperature", None) == 0
+    
+    def _model_name(self) -> str:
+        """Model identifier of self.llm, part of the response cache key."""
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "") or ""
+    
     def _format_output(self, analysis: Dict[str, Any], recommendations: list) -> Dict[str, Any]:
         """
         Format final output (can be overridden).
@@ -102,8 +364,17 @@ class BaseAgent(ABC):
     def _handle_error(self, error: Exception) -> Dict[str, Any]:
         """
         Handle errors gracefully.
+        
+        Expected failures (ExpectedAgentError) are logged as a one-line
+        warning. Anything else is logged as an error; the traceback is only
+        formatted when DEBUG is enabled.
         """
-        self.logger.error(f"❌ {self.name} error: {error}", exc_info=True)
+        if isinstance(error, ExpectedAgentError):
+            self.logger.warning("%s: %s", self.name, error)
+        elif self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.error("❌ %s error: %s", self.name, error, exc_info=error)
+        else:
+            self.logger.error("❌ %s error: %s: %s", self.name, type(error).__name__, error)
         return {
             "agent": self.name,
             "status": "error",
@@ -112,14 +383,22 @@ class BaseAgent(ABC):
             "recommendations": []
         }
     
-    def _log(self, step: str, message: str):
+    def _log(self, step: str, message: str, *args: Any):
         """
-        Log agent activity.
+        Log agent activity (no-op unless INFO logging is enabled).
+        `message` is a %-format string; `args` are only interpolated when the
+        entry is actually recorded.
         """
+        if not self._trace:
+            return
+        if args:
+            message = message % args
         log_entry = {
             "agent": self.name,
             "step": step,
             "message": message
         }
-        self.state.setdefault("logs", []).append(log_entry)
-        self.logger.info(f"[{self.name}] {step}: {message}")
+        if self._logs is None:
+            self._logs = []
+        self._logs.append(log_entry)
+        self.logger.info("[%s] %s: %s", self.name, step, message)
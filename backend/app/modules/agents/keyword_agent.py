@@ -3,14 +3,22 @@ Keyword Agent - Keyword Analysis & Optimization with AI
 Analyzes keyword presence and provides strategic placement recommendations.
 """
 
-from typing import Dict, Any, List
-from .base_agent import BaseAgent
-from langchain_core.prompts import ChatPromptTemplate
-import re
+from typing import Dict, Any, List, Optional, Tuple
+from .base_agent import BaseAgent, ExpectedAgentError, lowered_scraped
+from app.core.cache_manager import DirectMappedCache, SemanticCache
+from app.core.vector_store import get_embeddings
+from langchain_core.messages import HumanMessage, SystemMessage
+import ahocorasick
+import asyncio
+from bisect import bisect_right
+import logging
+import numpy as np
 
+logger = logging.getLogger(__name__)
 
-KEYWORD_PROMPT = ChatPromptTemplate.from_messages([
-    ("system", """Sei un SEO Keyword Strategist esperto.
+
+# Static system message built once; only the user turn is formatted per call
+KEYWORD_SYSTEM_MSG = SystemMessage(content="""Sei un SEO Keyword Strategist esperto.
     
     Analizza la presenza delle keyword target e fornisci:
     1. Valutazione dell'ottimizzazione attuale (0-100)
@@ -31,8 +39,9 @@ KEYWORD_PROMPT = ChatPromptTemplate.from_messages([
     ## 🎯 Azioni Specifiche
     1. **[Keyword]**: Inserisci in [dove] → [esempio concreto]
     2. **[Keyword]**: Modifica [cosa] → [esempio concreto]
-    """),
-    ("user", """
+    """)
+
+KEYWORD_USER_TEMPLATE = """
     **KEYWORD TARGET:**
     {target_keywords}
     
@@ -46,8 +55,77 @@ KEYWORD_PROMPT = ChatPromptTemplate.from_messages([
     - Content Length: {content_length} parole
     
     Genera raccomandazioni per ottimizzare keyword placement.
-    """)
-])
+    """
+
+KEYWORD_TEMPLATE_ID = "keyword_prompt_v1"
+
+# Near-duplicate requests are matched on an embedding of the slot values
+# ({target_keywords}, {keyword_presence}). The response also quotes the page
+# (title, meta, H1), so an entry is only reused for the same page summary.
+SEMANTIC_THRESHOLD = 0.92
+_semantic_cache = SemanticCache(capacity=1024, threshold=SEMANTIC_THRESHOLD)
+
+# Keyword presence flags as bits of one mask per keyword
+_IN_TITLE, _IN_META, _IN_H1, _IN_H2, _IN_CONTENT, _IN_URL, _IN_ALT = (1 << i for i in range(7))
+_FIELD_BITS = (_IN_TITLE, _IN_META, _IN_H1, _IN_H2, _IN_URL, _IN_ALT)  # fields matched by presence only
+
+# Optimization score weight per flag, and score/status precomputed for all 128 masks
+_FIELD_WEIGHTS = np.array([25, 20, 20, 10, 15, 5, 5], dtype=np.int16)  # bit 0 .. bit 6
+
+# Scores for all 128 masks in one (128, 7) @ (7,) product; per-keyword scoring
+# is then a tuple index, with plain ints/strs in the JSON-bound output
+_MASK_BITS = (np.arange(128)[:, None] >> np.arange(7)) & 1
+_SCORE_ARRAY = np.minimum(_MASK_BITS.astype(np.int16) @ _FIELD_WEIGHTS, 100)
+_SCORE_BY_MASK = tuple(_SCORE_ARRAY.tolist())
+_STATUS_BY_MASK = tuple(np.where(
+    _SCORE_ARRAY >= 60, "optimized", np.where(_SCORE_ARRAY >= 30, "needs_work", "missing")
+).tolist())
+
+# Recommendation parsing: list markers stripped from the action text, and cap
+_REC_PREFIX_CHARS = "0123456789.-*• \t"
+_MAX_RECOMMENDATIONS = 15
+
+# Compiled keyword automata, keyed by the deduplicated lowercase keyword list,
+# so repeat runs on the same keyword set skip building the trie
+_automaton_cache = DirectMappedCache(size=64)
+
+
+def _keyword_automaton(keywords: List[str]) -> Tuple[List[Optional[int]], int, Optional[ahocorasick.Automaton]]:
+    """
+    One Aho-Corasick automaton over all (deduplicated) keywords, so each
+    field is scanned once instead of once per keyword.
+    Returns (pattern id per keyword — None for blank ones —, number of
+    patterns, automaton); the automaton is None when there is no pattern.
+    """
+    pattern_ids: Dict[str, int] = {}
+    pids: List[Optional[int]] = []
+    for kw in keywords:
+        kw_lower = kw.lower().strip()
+        if not kw_lower:
+            pids.append(None)
+            continue
+        pid = pattern_ids.get(kw_lower)
+        if pid is None:
+            pid = pattern_ids[kw_lower] = len(pattern_ids)
+        pids.append(pid)
+    if not pattern_ids:
+        return pids, 0, None
+    
+    cache_key = "\x00".join(pattern_ids)
+    automaton = _automaton_cache.get(cache_key)
+    if automaton is None:
+        automaton = ahocorasick.Automaton()
+        for kw_lower, pid in pattern_ids.items():
+            automaton.add_word(kw_lower, (pid, len(kw_lower)))
+        automaton.make_automaton()
+        _automaton_cache.set(cache_key, automaton)
+    return pids, len(pattern_ids), automaton
+
+
+PATCH_SYSTEM_MSG = SystemMessage(content="""Sei un editor SEO.
+Ti viene data una risposta scritta per altre keyword. Riscrivila per le nuove keyword:
+sostituisci i nomi delle keyword originali con quelli nuovi e adatta solo i punti che le citano.
+Mantieni identici struttura, formato e lingua. Rispondi solo con il testo riscritto.""")
 
 
 class KeywordAgent(BaseAgent):
@@ -63,6 +141,8 @@ class KeywordAgent(BaseAgent):
         - recommendations: Where and how to place keywords
     """
     
+    __slots__ = ()
+    
     def analyze(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze keyword presence in content.
@@ -70,6 +150,13 @@ class KeywordAgent(BaseAgent):
         scraped = data.get("scraped_data", {})
         keywords = data.get("target_keywords", [])
         
+        if not isinstance(scraped, dict):
+            raise ExpectedAgentError("No scraped data provided")
+        # Keywords as list[str] from here on (drops None/empty entries)
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        keywords = [str(kw) for kw in keywords or () if kw]
+        
         if not keywords:
             return {"error": "No keywords provided", "keyword_analysis": []}
         
@@ -85,7 +172,7 @@ class KeywordAgent(BaseAgent):
                 "title": scraped.get("title", ""),
                 "meta_description": scraped.get("meta_description", ""),
                 "h1": scraped.get("h1", [""])[0] if scraped.get("h1") else "",
-                "content_length": sum(len(p.split()) for p in scraped.get("paragraphs", []))
+                "content_length": lowered_scraped(scraped)["content_length"]
             }
         }
     
@@ -96,7 +183,59 @@ class KeywordAgent(BaseAgent):
         if analysis.get("error"):
             return []
         
-        # Prepare keyword presence summary
+        target_kw_str, presence_summary = self._prompt_slots(analysis)
+        messages = self._build_messages(analysis, target_kw_str, presence_summary)
+        
+        # Exact repeats are served by the response cache, before any embedding
+        key, content = self._lookup_llm_cache(messages)
+        if content is None:
+            vector = self._slot_embedding(target_kw_str, presence_summary)
+            page = self._page_signature(analysis)
+            entry = self._semantic_lookup(vector, page)
+            
+            # Generate LLM recommendations (or patch a near-duplicate response)
+            if entry is None:
+                content = self._complete_llm(messages, key)
+                self._semantic_store(vector, page, target_kw_str, content)
+            elif entry["keywords"] == target_kw_str:
+                content = entry["response_template"]
+            else:
+                content = self._invoke_llm(self._patch_messages(entry, target_kw_str))
+        
+        # Parse recommendations
+        return self._parse_keyword_recommendations(content, analysis.get("keyword_details", []))
+    
+    async def agenerate_recommendations(self, analysis: Dict[str, Any]) -> list:
+        """
+        Async variant of generate_recommendations() using llm.ainvoke, so
+        execute_batch_async() can keep several pages in flight.
+        """
+        if analysis.get("error"):
+            return []
+        
+        target_kw_str, presence_summary = self._prompt_slots(analysis)
+        messages = self._build_messages(analysis, target_kw_str, presence_summary)
+        
+        key, content = self._lookup_llm_cache(messages)
+        if content is None:
+            vector = await asyncio.to_thread(self._slot_embedding, target_kw_str, presence_summary)
+            page = self._page_signature(analysis)
+            entry = self._semantic_lookup(vector, page)
+            
+            if entry is None:
+                content = await self._acomplete_llm(messages, key)
+                self._semantic_store(vector, page, target_kw_str, content)
+            elif entry["keywords"] == target_kw_str:
+                content = entry["response_template"]
+            else:
+                content = await self._ainvoke_llm(self._patch_messages(entry, target_kw_str))
+        
+        return self._parse_keyword_recommendations(content, analysis.get("keyword_details", []))
+    
+    def _prompt_slots(self, analysis: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        The variable part of the prompt: (target keywords, presence summary).
+        """
         kw_details = analysis.get("keyword_details", [])
         target_kw_str = ", ".join([k["keyword"] for k in kw_details])
         
@@ -105,11 +244,14 @@ class KeywordAgent(BaseAgent):
             f"in_content={k['in_content']}, score={k['optimization_score']}/100"
             for k in kw_details
         ])
-        
+        return target_kw_str, presence_summary
+    
+    def _build_messages(self, analysis: Dict[str, Any], target_kw_str: str, presence_summary: str) -> list:
+        """
+        Format the full keyword prompt for one analysis.
+        """
         summary = analysis.get("scraped_summary", {})
-        
-        # Generate LLM recommendations
-        messages = KEYWORD_PROMPT.format_messages(
+        user_msg = KEYWORD_USER_TEMPLATE.format(
             target_keywords=target_kw_str,
             keyword_presence=presence_summary,
             title=summary.get("title", ""),
@@ -117,59 +259,131 @@ class KeywordAgent(BaseAgent):
             h1=summary.get("h1", ""),
             content_length=summary.get("content_length", 0)
         )
-        
-        result = self.llm.invoke(messages)
-        
-        # Parse recommendations
-        recommendations = self._parse_keyword_recommendations(result.content, kw_details)
-        
-        return recommendations
+        return [KEYWORD_SYSTEM_MSG, HumanMessage(content=user_msg)]
+    
+    def _slot_embedding(self, target_kw_str: str, presence_summary: str) -> Optional[List[float]]:
+        """Embedding of the prompt slot values, or None if embeddings are unavailable."""
+        try:
+            return get_embeddings().embed_query(f"{target_kw_str}\n{presence_summary}")
+        except Exception as e:
+            logger.warning("Keyword semantic cache unavailable: %s", e)
+            return None
+    
+    def _page_signature(self, analysis: Dict[str, Any]) -> Tuple[Any, ...]:
+        """The page fields the prompt (and so the response) quotes."""
+        summary = analysis.get("scraped_summary", {})
+        return (
+            summary.get("title", ""),
+            summary.get("meta_description", ""),
+            summary.get("h1", ""),
+            summary.get("content_length", 0),
+        )
+    
+    def _semantic_lookup(self, vector: Optional[List[float]], page: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        """
+        Cache entry stored for a near-duplicate prompt on the same page, or None.
+        """
+        if vector is None:
+            return None
+        # Filtered inside get() so rejected entries count as misses
+        return _semantic_cache.get(
+            vector,
+            accept=lambda entry: entry["template_id"] == KEYWORD_TEMPLATE_ID and entry["page"] == page,
+        )
+    
+    def _semantic_store(self, vector: Optional[List[float]], page: Tuple[Any, ...], target_kw_str: str, content: str) -> None:
+        if vector is not None:
+            _semantic_cache.set(vector, {
+                "template_id": KEYWORD_TEMPLATE_ID,
+                "page": page,
+                "keywords": target_kw_str,
+                "response_template": content,
+            })
+    
+    def _patch_messages(self, entry: Dict[str, Any], target_kw_str: str) -> list:
+        """
+        Short "patch" prompt that rewrites the keyword names in a cached
+        response instead of running the full generation.
+        """
+        return [
+            PATCH_SYSTEM_MSG,
+            HumanMessage(content=(
+                f"Keyword originali: {entry['keywords']}\n"
+                f"Nuove keyword: {target_kw_str}\n\n"
+                f"Risposta:\n{entry['response_template']}"
+            )),
+        ]
     
     def _analyze_keyword_presence(self, scraped: Dict, keywords: List[str]) -> Dict:
         """
         Analyze where each keyword appears in content.
         """
-        title = (scraped.get("title") or "").lower()
-        meta_desc = (scraped.get("meta_description") or "").lower()
-        h1_list = [h.lower() for h in (scraped.get("h1") or [])]
-        h2_list = [h.lower() for h in (scraped.get("h2") or [])]
-        paragraphs = " ".join(scraped.get("paragraphs") or []).lower()
-        alt_texts = " ".join(scraped.get("images_alt") or []).lower()
-        url = (scraped.get("url") or "").lower()
+        # Always str / list[str], see lowered_scraped()
+        lowered = lowered_scraped(scraped)
+        title = lowered["title"]
+        meta_desc = lowered["meta_description"]
+        h1_list = lowered["h1"]
+        h2_list = lowered["h2"]
+        paragraphs = lowered["paragraphs"]
+        alt_texts = " ".join(lowered["images_alt"])
+        url = lowered["url"]
+        
+        # Per-keyword columns: pattern id, and per pattern a presence
+        # bitmask (bit order of _FIELD_WEIGHTS) and content occurrence count
+        pids, n_patterns, automaton = _keyword_automaton(keywords)
+        
+        masks = [0] * n_patterns
+        counts = [0] * n_patterns
+        if automaton is not None:
+            # The short fields are packed into one NUL-separated buffer and
+            # scanned once; each match is bucketed into its field by offset
+            fields = (title, meta_desc, "\n".join(h1_list), "\n".join(h2_list), url, alt_texts)
+            starts = []
+            pos = 0
+            for text in fields:
+                starts.append(pos)
+                pos += len(text) + 1
+            for end, (pid, length) in automaton.iter("\x00".join(fields)):
+                masks[pid] |= _FIELD_BITS[bisect_right(starts, end - length + 1) - 1]
+            
+            # Paragraphs are scanned one at a time rather than joined into one
+            # large buffer. Non-overlapping counts (same as str.count):
+            # matches arrive ordered by end position, keep those starting
+            # after the previous kept match of the same pattern
+            last_end = [-1] * n_patterns
+            offset = 0
+            for paragraph in paragraphs:
+                for end, (pid, length) in automaton.iter(paragraph):
+                    end += offset
+                    if end - length >= last_end[pid]:
+                        counts[pid] += 1
+                        last_end[pid] = end
+                        masks[pid] |= _IN_CONTENT
+                offset += len(paragraph) + 1
         
         results = []
         total_found = 0
         
-        for kw in keywords:
-            kw_lower = kw.lower().strip()
-            if not kw_lower:
+        for kw, pid in zip(keywords, pids):
+            if pid is None:
                 continue
+            mask = masks[pid]
+            score = _SCORE_BY_MASK[mask]
             
             presence = {
                 "keyword": kw,
-                "in_title": kw_lower in title,
-                "in_meta_description": kw_lower in meta_desc,
-                "in_h1": any(kw_lower in h for h in h1_list),
-                "in_h2": any(kw_lower in h for h in h2_list),
-                "in_content": kw_lower in paragraphs,
-                "in_url": kw_lower in url,
-                "in_alt_text": kw_lower in alt_texts,
-                "content_count": len(re.findall(re.escape(kw_lower), paragraphs))
+                "in_title": bool(mask & _IN_TITLE),
+                "in_meta_description": bool(mask & _IN_META),
+                "in_h1": bool(mask & _IN_H1),
+                "in_h2": bool(mask & _IN_H2),
+                "in_content": bool(mask & _IN_CONTENT),
+                "in_url": bool(mask & _IN_URL),
+                "in_alt_text": bool(mask & _IN_ALT),
+                "content_count": counts[pid],
+                "optimization_score": score,
+                "status": _STATUS_BY_MASK[mask]
             }
             
-            # Calculate optimization score (0-100)
-            score = 0
-            if presence["in_title"]: score += 25
-            if presence["in_meta_description"]: score += 20
-            if presence["in_h1"]: score += 20
-            if presence["in_h2"]: score += 10
-            if presence["in_content"]: score += 15
-            if presence["in_url"]: score += 5
-            if presence["in_alt_text"]: score += 5
-            
-            presence["optimization_score"] = min(score, 100)
-            presence["status"] = "optimized" if score >= 60 else "needs_work" if score >= 30 else "missing"
-            
             if score > 0:
                 total_found += 1
             
@@ -188,25 +402,36 @@ class KeywordAgent(BaseAgent):
         Parse LLM output into structured keyword recommendations.
         """
         recommendations = []
-        lines = llm_output.split("\n")
         
-        for line in lines:
+        # Same automaton as the presence analysis (cached), so each line is
+        # scanned once for all keywords
+        keywords = [kw["keyword"] for kw in kw_details]
+        pids, _, automaton = _keyword_automaton(keywords)
+        if automaton is None:
+            return recommendations
+        keyword_by_pid: Dict[int, str] = {}
+        for kw, pid in zip(keywords, pids):
+            if pid is not None:
+                keyword_by_pid.setdefault(pid, kw)
+        
+        for line in llm_output.splitlines():
             line = line.strip()
+            if len(line) <= 20:  # Too short to be a recommendation
+                continue
             
-            # Detect recommendations (numbered or with keyword mentioned)
-            if any(kw["keyword"].lower() in line.lower() for kw in kw_details):
-                # Extract keyword from line
-                matched_kw = next(
-                    (kw["keyword"] for kw in kw_details if kw["keyword"].lower() in line.lower()),
-                    None
-                )
-                
-                if matched_kw and len(line) > 20:  # Valid recommendation
-                    recommendations.append({
-                        "keyword": matched_kw,
-                        "action": line.lstrip("0123456789.-*• ").strip(),
-                        "priority": len(recommendations) + 1,
-                        "category": "keyword"
-                    })
-        
-        return recommendations[:15]  # Limit to 15 recommendations
+            # Detect recommendations (keyword mentioned); the lowest pattern id
+            # is the first matching keyword in list order
+            pid = min((pid for _, (pid, _) in automaton.iter(line.lower())), default=None)
+            if pid is None:
+                continue
+            
+            recommendations.append({
+                "keyword": keyword_by_pid[pid],
+                "action": line.lstrip(_REC_PREFIX_CHARS),  # line is already stripped on the right
+                "priority": len(recommendations) + 1,
+                "category": "keyword"
+            })
+            if len(recommendations) == _MAX_RECOMMENDATIONS:
+                break
+        
+        return recommendations
@@ -3,15 +3,46 @@ ReAct Autonomous Orchestrator for SEO-PRO
 Uses Reasoning + Action loop with circuit breaker.
 """
 
-from typing import Dict, Any, List, Optional
-from langchain_core.prompts import ChatPromptTemplate
-from app.core.llm_factory import get_shared_llm
-import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from importlib import import_module
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+from langchain_core.messages import HumanMessage
+from app.core.llm_factory import cacheable_system_message, get_shared_llm
 import logging
+import orjson
+import re
 
 logger = logging.getLogger(__name__)
 
 
+# JSON object inside a ``` or ```json fence
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+@lru_cache(maxsize=64)
+def _parse_decision_content(content: str) -> Dict[str, Any]:
+    """
+    JSON decision from an LLM response, memoized on the response text
+    (speculative and repeated prompts often return identical content).
+    Callers must copy the result before changing it.
+    """
+    # Try to extract JSON from a markdown code block
+    match = _JSON_BLOCK_RE.search(content)
+    return orjson.loads(match.group(1) if match else content.strip())
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one SSE frame; the payload is serialized once, with orjson."""
+    payload = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS, default=str).decode()
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+# Speculative next-step reasoning calls, overlapped with tool execution
+_speculation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="react-speculation")
+
+
 class ReActOrchestrator:
     """
     Autonomous agent using ReAct (Reasoning + Acting) pattern.
@@ -87,25 +118,81 @@ class ReActOrchestrator:
         }
     }
     
-    # ReAct prompt for reasoning
-    REACT_PROMPT = ChatPromptTemplate.from_messages([
-        ("system", """You are an expert SEO analyst agent with autonomous decision-making capabilities.
+    # Tools whose findings appear in _summarize_findings() (and so change the
+    # next reasoning prompt)
+    SUMMARIZED_TOOLS = frozenset({
+        "scrape_url", "detect_seo_issues", "run_technical_checks",
+        "analyze_performance", "calculate_score",
+        "analyze_competitors", "find_top_competitors",
+    })
+    
+    # Final report streaming (_stream_final_report): issues per done_issues
+    # event, and the findings already sent under their own done_* events
+    DONE_ISSUES_CHUNK = 20
+    _REPORT_STREAMED_TOOLS = frozenset({"scrape_url", "detect_seo_issues", "generate_fixes"})
+    
+    # Findings each tool reads. Tools requested together in one decision run
+    # in parallel unless one depends on another in the same batch, in which
+    # case it runs in a later wave of that iteration.
+    TOOL_DEPENDENCIES = {
+        "detect_seo_issues": ("scrape_url",),
+        "run_technical_checks": ("scrape_url",),
+        "analyze_competitors": ("scrape_url",),
+        "analyze_authority": ("scrape_url",),
+        "optimize_keywords": ("scrape_url",),
+        "generate_fixes": ("scrape_url", "detect_seo_issues"),
+        "create_seo_strategy": ("scrape_url", "detect_seo_issues"),
+        "create_roadmap": ("detect_seo_issues",),
+        "calculate_score": ("detect_seo_issues",),
+    }
+    
+    # Static policy for the common trajectory (scrape → detect + technical →
+    # score + fixes), keyed by the set of completed actions. While the run
+    # stays on this path the next step is taken from the table instead of an
+    # LLM call; any other state falls back to _reason_next_action's LLM call.
+    FAST_POLICY = {
+        frozenset(): {
+            "next_action": "scrape_url",
+            "reasoning": "Fast policy: scrape the page first",
+        },
+        frozenset({"scrape_url"}): {
+            "next_action": "detect_seo_issues",
+            "next_actions": ["detect_seo_issues", "run_technical_checks"],
+            "reasoning": "Fast policy: on-page and technical checks on the scraped page",
+        },
+        frozenset({"scrape_url", "detect_seo_issues", "run_technical_checks"}): {
+            "next_action": "calculate_score",
+            "next_actions": ["calculate_score", "generate_fixes"],
+            "reasoning": "Fast policy: no critical issues, score the page and generate fixes",
+            "stop_after": True,
+        },
+    }
+    
+    # Options that call for tools outside the fast policy path
+    POLICY_BYPASS_OPTIONS = ("competitor_url", "keywords", "target_keywords")
+    
+    # Tool list for the reasoning prompt; AVAILABLE_TOOLS is constant
+    TOOLS_LIST = "\n".join(
+        f"- {name}: {info['description']} (cost: {info['cost']}, ~{info['avg_time']})"
+        for name, info in AVAILABLE_TOOLS.items()
+    )
+    
+    # ReAct prompt for reasoning. The system block is identical on every
+    # call (role, tools, rules), so providers can serve it from the prompt
+    # cache; everything that changes per iteration is in the user message.
+    REACT_SYSTEM_PROMPT = """You are an expert SEO analyst agent with autonomous decision-making capabilities.
 
-Your goal: Perform the most effective SEO analysis for the given URL within {max_iterations} iterations.
+Your goal: Perform the most effective SEO analysis for the given URL within the iteration budget shown in the current state.
 
 Available tools:
-{tools_list}
-
-Current state:
-- URL: {url}
-- Iteration: {current_iteration}/{max_iterations}
-- Completed actions: {completed_actions}
-- Current findings: {current_findings}
+""" + TOOLS_LIST + """
 
 Instructions:
 1. THINK: Analyze current findings and decide next best action
 2. REASON: Explain why this action is valuable now
-3. ACT: Choose ONE tool to execute
+3. ACT: Choose the next tool to execute. If several tools are independent of each other
+   (e.g. run_technical_checks, analyze_performance, find_top_competitors after scrape_url),
+   list them all in "next_actions" and they will run in parallel
 4. EVALUATE: After action, decide if you have enough information or need more
 
 Optimization rules:
@@ -116,18 +203,42 @@ Optimization rules:
 - Use expensive tools (competitors, performance) only if critical issues detected
 
 Output format (JSON):
-{{
+{
   "reasoning": "Why I'm choosing this action based on current findings",
   "next_action": "tool_name",
+  "next_actions": ["tool_name", "other_independent_tool"],
   "expected_value": "What insight this will provide",
   "stop_after": true/false,
   "confidence": 0-100
-}}
+}
 
 If you believe you have enough information to provide valuable recommendations, set "next_action": "STOP" and "stop_after": true.
-"""),
-        ("user", "Decide the next action for SEO analysis of {url}")
-    ])
+"""
+    
+    # Where each tool's callable lives; imported lazily by _tool_func()
+    _TOOL_IMPORTS = {
+        "scrape_url": ("app.modules.scraper", "smart_scrape_url"),
+        "detect_seo_issues": ("app.modules.seo_detection_unified", "detect_seo_issues_unified"),
+        "run_technical_checks": ("app.modules.seo_technical", "run_technical_checks"),
+        "analyze_performance": ("app.modules.competitor.lighthouse_client", "run_performance_engine"),
+        "analyze_competitors": ("app.modules.competitor", "run_competitor_analysis"),
+        "find_top_competitors": ("app.modules.competitor", "discover_competitors_auto"),
+        "analyze_authority": ("app.modules.agents.authority_agent", "AuthorityAgent"),
+        "optimize_keywords": ("app.modules.agents.keyword_agent", "KeywordAgent"),
+        "generate_fixes": ("app.modules.ai_fix_agents", "generate_fix_suggestions"),
+        "create_seo_strategy": ("app.modules.ai_strategy_agent", "generate_seo_strategy_comprehensive"),
+        "create_roadmap": ("app.modules.ai_roadmap_agent", "generate_seo_roadmap"),
+        "calculate_score": ("app.modules.seo_rules", "calculate_seo_score"),
+    }
+    _TOOL_FUNCS: Dict[str, Callable] = {}
+    
+    REACT_USER_TEMPLATE = """Current state:
+- URL: {url}
+- Iteration: {current_iteration}/{max_iterations}
+- Completed actions: {completed_actions}
+- Current findings: {current_findings}
+
+Decide the next action for SEO analysis of {url}"""
     
     def __init__(self, max_iterations: int = 8):
         """
@@ -139,7 +250,31 @@ If you believe you have enough information to provide valuable recommendations,
         self.max_iterations = max_iterations
         self.llm = get_shared_llm()
         self.state = {}
-        self.reasoning_log = []
+        # One entry per reasoning step; bounded so a long-lived orchestrator
+        # can't grow it without limit
+        self.reasoning_log: Deque[Dict[str, Any]] = deque(maxlen=max(1, max_iterations) * 2)
+        # Bumped whenever state["findings"] changes; keys _summary_cache and _view_cache
+        self._findings_version = 0
+        self._summary_cache: Optional[Tuple[int, str]] = None
+        self._view_cache: Optional[Tuple[int, Dict[str, Any], List[Dict[str, Any]]]] = None
+    
+    def _init_state(self, url: str, options: Dict[str, Any]):
+        """Reset the run state for a new analysis of `url`."""
+        self.state = {
+            "url": url,
+            "options": options,
+            "completed_actions": [],
+            "findings": {},
+            "iteration": 0,
+            "total_cost_estimate": 0,
+            "policy_stats": {"hits": 0, "misses": 0}
+        }
+        self.reasoning_log.clear()
+        self._findings_version += 1
+        self._summary_cache = None
+        self._view_cache = None
+        # Tool -> identity of the dependency findings its last successful run used
+        self._tool_inputs: Dict[str, Tuple[int, ...]] = {}
         
     def execute(self, url: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -154,30 +289,25 @@ If you believe you have enough information to provide valuable recommendations,
         """
         options = options or {}
         
-        # Initialize state
-        self.state = {
-            "url": url,
-            "options": options,
-            "completed_actions": [],
-            "findings": {},
-            "iteration": 0,
-            "total_cost_estimate": 0
-        }
+        self._init_state(url, options)
         
         logger.info(f"Starting autonomous analysis for {url} (max {self.max_iterations} iterations)")
         
         # ReAct loop
+        speculation = None
         while self.state["iteration"] < self.max_iterations:
             self.state["iteration"] += 1
             
             # Get next action from LLM
-            decision = self._reason_next_action()
+            decision = self._reason_next_action(speculation)
+            speculation = None
             
             if not decision or decision.get("next_action") == "STOP":
                 logger.info(f"Agent decided to stop at iteration {self.state['iteration']}")
                 break
             
-            # Execute action
+            # Execute action, with the next reasoning step speculatively in flight
+            speculation = self._speculate(decision)
             self._execute_action(decision)
             
             # Check if agent wants to stop
@@ -195,247 +325,493 @@ If you believe you have enough information to provide valuable recommendations,
         """
         options = options or {}
         
-        def sse(event: str, data: dict):
-            import json
-            return f"event: {event}\ndata: {json.dumps(data)}\n\n"
-        
-        # Initialize state
-        self.state = {
-            "url": url,
-            "options": options,
-            "completed_actions": [],
-            "findings": {},
-            "iteration": 0,
-            "total_cost_estimate": 0
-        }
+        self._init_state(url, options)
         
         logger.info(f"Starting autonomous streaming analysis for {url} (max {self.max_iterations} iterations)")
-        yield sse("log", {"message": f"🤖 Starting autonomous analysis (max {self.max_iterations} iterations)", "step": "init", "status": "running"})
+        yield _sse("log", {"message": f"🤖 Starting autonomous analysis (max {self.max_iterations} iterations)", "step": "init", "status": "running"})
         
         # ReAct loop with streaming
+        speculation = None
         while self.state["iteration"] < self.max_iterations:
             self.state["iteration"] += 1
             
             # Get next action from LLM
-            yield sse("log", {"message": f"🧠 AI thinking... (iteration {self.state['iteration']})", "step": "reasoning", "status": "running"})
-            decision = self._reason_next_action()
+            yield _sse("log", {"message": f"🧠 AI thinking... (iteration {self.state['iteration']})", "step": "reasoning", "status": "running"})
+            decision = self._reason_next_action(speculation)
+            speculation = None
             
             if not decision or decision.get("next_action") == "STOP":
                 logger.info(f"Agent decided to stop at iteration {self.state['iteration']}")
-                yield sse("log", {"message": "✅ Agent decided analysis is complete", "step": "reasoning", "status": "done"})
+                yield _sse("log", {"message": "✅ Agent decided analysis is complete", "step": "reasoning", "status": "done"})
                 break
             
+            actions = self._decision_actions(decision)
+            
             # Stream reasoning
-            yield sse("reasoning", {
+            yield _sse("reasoning", {
                 "iteration": self.state["iteration"],
                 "reasoning": decision.get("reasoning"),
-                "action": decision.get("next_action"),
+                "action": ", ".join(actions) or decision.get("next_action"),
                 "confidence": decision.get("confidence", 85)
             })
             
-            # Execute action with streaming
-            action = decision.get("next_action")
-            yield sse("log", {"message": f"⚙️ Executing: {action}", "step": action, "status": "running"})
+            # Execute action(s) with streaming
+            for action in actions:
+                yield _sse("log", {"message": f"⚙️ Executing: {action}", "step": action, "status": "running"})
             
+            speculation = self._speculate(decision)
             self._execute_action(decision)
             
-            # Stream intermediate results based on action
-            if action in self.state["findings"]:
-                result = self.state["findings"][action]
+            for action in actions:
+                # Stream intermediate results based on action
+                if action in self.state["findings"]:
+                    result = self.state["findings"][action]
+                    
+                    # Emit specific events based on tool
+                    if action == "scrape_url":
+                        yield _sse("scrape", result)
+                    elif action == "detect_seo_issues":
+                        yield _sse("onpage_errors", result.get("issues", []))
+                    elif action == "calculate_score":
+                        yield _sse("seo_score", {"score": result.get("score", 0)})
+                    elif action == "run_technical_checks":
+                        yield _sse("technical", result)
+                    elif action == "analyze_performance":
+                        yield _sse("performance", result)
+                    elif action == "generate_fixes":
+                        yield _sse("fixes", result.get("fixes", []))
                 
-                # Emit specific events based on tool
-                if action == "scrape_url":
-                    yield sse("scrape", result)
-                elif action == "detect_seo_issues":
-                    yield sse("onpage_errors", result.get("issues", []))
-                elif action == "calculate_score":
-                    yield sse("seo_score", {"score": result.get("score", 0)})
-                elif action == "run_technical_checks":
-                    yield sse("technical", result)
-                elif action == "analyze_performance":
-                    yield sse("performance", result)
-                elif action == "generate_fixes":
-                    yield sse("fixes", result.get("fixes", []))
-            
-            yield sse("log", {"message": f"✓ {action} complete", "step": action, "status": "done"})
+                yield _sse("log", {"message": f"✓ {action} complete", "step": action, "status": "done"})
             
             # Check if agent wants to stop
             if decision.get("stop_after"):
                 logger.info("Agent set stop_after=true, terminating loop")
-                yield sse("log", {"message": "✅ Agent reached stopping criteria", "step": "reasoning", "status": "done"})
+                yield _sse("log", {"message": "✅ Agent reached stopping criteria", "step": "reasoning", "status": "done"})
                 break
         
         # Final compilation
-        yield sse("log", {"message": "📊 Compiling final report...", "step": "compile", "status": "running"})
-        final_result = self._compile_final_report()
+        yield _sse("log", {"message": "📊 Compiling final report...", "step": "compile", "status": "running"})
+        yield from self._stream_final_report(self._compile_final_report())
+    
+    def _stream_final_report(self, report: Dict[str, Any]):
+        """
+        Send the final report as several small SSE events instead of one
+        frame holding the whole analysis:
+        
+        - done_meta: run info, score, summary
+        - done_seo_data: the scraped page data
+        - done_issues: issues in slices of DONE_ISSUES_CHUNK
+        - done_fixes: generated fixes
+        - done_finding: one event per remaining tool result
+        - done_reasoning: the reasoning log
+        - done: {"status": "complete"}, sent last
+        """
+        streamed = {"seo_data", "issues", "fixes", "findings", "reasoning_log"}
+        yield _sse("done_meta", {key: value for key, value in report.items() if key not in streamed})
+        yield _sse("done_seo_data", report["seo_data"])
+        
+        issues = report["issues"]
+        for start in range(0, len(issues), self.DONE_ISSUES_CHUNK):
+            yield _sse("done_issues", {
+                "offset": start,
+                "total": len(issues),
+                "issues": issues[start:start + self.DONE_ISSUES_CHUNK],
+            })
         
-        yield sse("done", final_result)
+        yield _sse("done_fixes", report["fixes"])
+        for tool, result in report["findings"].items():
+            if tool not in self._REPORT_STREAMED_TOOLS:
+                yield _sse("done_finding", {"tool": tool, "result": result})
+        yield _sse("done_reasoning", report["reasoning_log"])
+        yield _sse("done", {"status": "complete"})
     
-    def _reason_next_action(self) -> Optional[Dict[str, Any]]:
+    def _reason_next_action(self, speculation: Optional[Tuple[list, Future]] = None) -> Optional[Dict[str, Any]]:
         """
         Use LLM to decide next action based on current state.
+        
+        If `speculation` (from _speculate()) was made for exactly the prompt
+        the current state produces, its in-flight response is used instead of
+        a new LLM call.
         """
+        decision = self._fast_policy()
+        if decision is not None:
+            if speculation is not None:
+                speculation[1].cancel()
+            self._record_decision(decision, source="policy")
+            return decision
+        
         try:
-            # Format tools list
-            tools_list = "\n".join([
-                f"- {name}: {info['description']} (cost: {info['cost']}, ~{info['avg_time']})"
-                for name, info in self.AVAILABLE_TOOLS.items()
-            ])
-            
-            # Format current findings summary
-            findings_summary = self._summarize_findings()
-            
-            # Invoke LLM
-            messages = self.REACT_PROMPT.format_messages(
-                url=self.state["url"],
-                max_iterations=self.max_iterations,
-                current_iteration=self.state["iteration"],
-                tools_list=tools_list,
-                completed_actions=", ".join(self.state["completed_actions"]) or "None",
-                current_findings=findings_summary
+            messages = self._build_reasoning_messages(
+                self.state["iteration"], self.state["completed_actions"]
             )
             
-            response = self.llm.invoke(messages)
+            # Invoke LLM (or take the speculative response)
+            if speculation is not None and speculation[0] == messages:
+                logger.info(f"Iteration {self.state['iteration']}: using speculative decision")
+                response = speculation[1].result()
+            else:
+                response = self.llm.invoke(messages)
             
             # Parse decision
             decision = self._parse_decision(response.content)
             
-            # Log reasoning
-            self.reasoning_log.append({
-                "iteration": self.state["iteration"],
-                "reasoning": decision.get("reasoning"),
-                "action": decision.get("next_action"),
-                "confidence": decision.get("confidence")
-            })
-            
-            logger.info(f"Iteration {self.state['iteration']}: {decision.get('next_action')} - {decision.get('reasoning')}")
-            
+            self._record_decision(decision, source="llm")
             return decision
             
         except Exception as e:
             logger.error(f"Error in reasoning: {e}")
             return None
     
+    def _record_decision(self, decision: Dict[str, Any], source: str):
+        """Append a decision to reasoning_log; `source` is "policy" or "llm"."""
+        self.reasoning_log.append({
+            "iteration": self.state["iteration"],
+            "reasoning": decision.get("reasoning"),
+            "action": decision.get("next_action"),
+            "confidence": decision.get("confidence"),
+            "source": source
+        })
+        
+        logger.info(f"Iteration {self.state['iteration']} ({source}): {decision.get('next_action')} - {decision.get('reasoning')}")
+    
+    def _fast_policy(self) -> Optional[Dict[str, Any]]:
+        """
+        Decision from FAST_POLICY for the current state, or None when the LLM
+        has to decide: unknown state, a failed tool, options that need other
+        tools (POLICY_BYPASS_OPTIONS), critical issues found, or an iteration
+        budget too small for the fixed path.
+        
+        Hits and misses are counted in state["policy_stats"].
+        """
+        stats = self.state["policy_stats"]
+        completed = frozenset(self.state["completed_actions"])
+        decision = self.FAST_POLICY.get(completed)
+        
+        if (
+            decision is None
+            or len(self.state["findings"]) != len(completed)  # a tool failed
+            or self.max_iterations < len(self.FAST_POLICY)
+            or any(self.state["options"].get(key) for key in self.POLICY_BYPASS_OPTIONS)
+            or self._critical_issue_count() > 0
+        ):
+            stats["misses"] += 1
+            return None
+        
+        stats["hits"] += 1
+        return {**decision, "confidence": 100}
+    
+    def _critical_issue_count(self) -> int:
+        """Critical issues found by detect_seo_issues so far (0 if not run)."""
+        return sum(1 for i in self._get_issues() if i.get("severity") == "critical")
+    
+    def _build_reasoning_messages(self, iteration: int, completed_actions: List[str]) -> list:
+        """Build the ReAct prompt for the given iteration and completed actions."""
+        return [
+            cacheable_system_message(self.REACT_SYSTEM_PROMPT),
+            HumanMessage(content=self.REACT_USER_TEMPLATE.format(
+                url=self.state["url"],
+                max_iterations=self.max_iterations,
+                current_iteration=iteration,
+                completed_actions=", ".join(completed_actions) or "None",
+                current_findings=self._summarize_findings()
+            )),
+        ]
+    
+    def _speculate(self, decision: Dict[str, Any]) -> Optional[Tuple[list, Future]]:
+        """
+        Start the next iteration's reasoning call while the current tools run.
+        
+        Only done when the chosen tools don't feed _summarize_findings(): then,
+        if they succeed, the next prompt is fully predictable (same findings
+        summary, actions appended to completed_actions) and the speculative
+        response is exact. A failed tool changes the prompt, so the
+        prediction no longer matches and the response is discarded.
+        """
+        actions = self._actions_to_run(decision)
+        if (
+            not actions
+            or decision.get("stop_after")
+            or self.state["iteration"] >= self.max_iterations
+            or any(action in self.SUMMARIZED_TOOLS for action in actions)
+        ):
+            return None
+        
+        predicted_completed = self.state["completed_actions"] + [
+            action for wave in self._plan_waves(actions) for action in wave
+        ]
+        messages = self._build_reasoning_messages(self.state["iteration"] + 1, predicted_completed)
+        return messages, _speculation_pool.submit(self.llm.invoke, messages)
+    
     def _parse_decision(self, content: str) -> Dict[str, Any]:
         """Parse LLM decision from JSON response."""
         try:
-            # Try to extract JSON from markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            decision = json.loads(content)
-            return decision
+            return dict(_parse_decision_content(content))
         except Exception as e:
             logger.error(f"Failed to parse decision: {e}")
             # Fallback: try to extract action from text
             return {"next_action": "STOP", "reasoning": "Parse error", "stop_after": True}
     
+    def _decision_actions(self, decision: Dict[str, Any]) -> List[str]:
+        """
+        Known tools requested by a decision, in order and without duplicates:
+        "next_actions" when the LLM returned a batch, else "next_action".
+        """
+        actions = decision.get("next_actions")
+        if not isinstance(actions, list) or not actions:
+            actions = [decision.get("next_action")]
+        return [a for a in dict.fromkeys(a for a in actions if isinstance(a, str)) if a in self.AVAILABLE_TOOLS]
+    
+    def _plan_waves(self, actions: List[str]) -> List[List[str]]:
+        """
+        Split a batch of actions into waves: each action runs after the
+        actions of the same batch it depends on (TOOL_DEPENDENCIES), and the
+        actions within a wave are independent of each other.
+        """
+        batch = set(actions)
+        depth: Dict[str, int] = {}
+        
+        def _depth(action: str) -> int:
+            if action not in depth:
+                deps = [d for d in self.TOOL_DEPENDENCIES.get(action, ()) if d in batch]
+                depth[action] = 1 + max((_depth(d) for d in deps), default=-1)
+            return depth[action]
+        
+        waves: List[List[str]] = []
+        for action in actions:
+            index = _depth(action)
+            while len(waves) <= index:
+                waves.append([])
+            waves[index].append(action)
+        return waves
+    
+    def _tool_input_key(self, action: str) -> Tuple[int, ...]:
+        """Identity of the findings `action` reads (see TOOL_DEPENDENCIES)."""
+        findings = self.state["findings"]
+        return tuple(id(findings.get(dep)) for dep in self.TOOL_DEPENDENCIES.get(action, ()))
+    
+    def _actions_to_run(self, decision: Dict[str, Any]) -> List[str]:
+        """
+        The decision's actions minus those whose findings are still current:
+        the tool already succeeded on the same dependency results, and no
+        dependency is re-run in this batch. E.g. calculate_score requested
+        again after generate_fixes is skipped, but runs again if
+        detect_seo_issues was refreshed. "force_refresh" in the decision
+        re-runs everything.
+        """
+        actions = self._decision_actions(decision)
+        if decision.get("force_refresh"):
+            return actions
+        
+        run: List[str] = []
+        for wave in self._plan_waves(actions):
+            for action in wave:
+                if (
+                    self._tool_inputs.get(action) != self._tool_input_key(action)
+                    or any(dep in run for dep in self.TOOL_DEPENDENCIES.get(action, ()))
+                ):
+                    run.append(action)
+        return run
+    
     def _execute_action(self, decision: Dict[str, Any]):
-        """Execute the chosen tool action."""
-        action = decision.get("next_action")
+        """
+        Execute the chosen tool action(s). Independent tools of one decision
+        run concurrently in threads (they are I/O-bound: HTTP, Lighthouse,
+        LLM), so the iteration takes max(latency) instead of the sum.
+        Tools whose findings are still current are not re-run.
+        """
+        actions = self._actions_to_run(decision)
+        skipped = [a for a in self._decision_actions(decision) if a not in actions]
+        if skipped:
+            logger.info(f"Skipping {', '.join(skipped)}: results already in findings")
         
-        if action in self.AVAILABLE_TOOLS:
-            logger.info(f"Executing: {action}")
+        for wave in self._plan_waves(actions):
+            logger.info(f"Executing: {', '.join(wave)}")
             
-            try:
-                # Execute tool
-                result = self._run_tool(action)
+            if len(wave) == 1:
+                outcomes = [self._run_tool_safe(wave[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=len(wave)) as pool:
+                    outcomes = list(pool.map(self._run_tool_safe, wave))
+            
+            # State is only updated here, on the calling thread
+            for action, (result, error) in zip(wave, outcomes):
+                if error is not None:
+                    logger.error(f"Error executing {action}: {error}")
+                    self.state["findings"][action] = {"error": str(error)}
+                    self._findings_version += 1
+                    continue
                 
                 # Update state
+                self._tool_inputs[action] = self._tool_input_key(action)
                 self.state["completed_actions"].append(action)
                 self.state["findings"][action] = result
+                self._findings_version += 1
                 
                 # Update cost estimate
                 cost_map = {"low": 1, "medium": 2, "high": 4, "very_high": 8}
                 self.state["total_cost_estimate"] += cost_map.get(
                     self.AVAILABLE_TOOLS[action]["cost"], 2
                 )
-                
-            except Exception as e:
-                logger.error(f"Error executing {action}: {e}")
-                self.state["findings"][action] = {"error": str(e)}
+    
+    def _run_tool_safe(self, tool_name: str):
+        """_run_tool() returning (result, None) or (None, exception)."""
+        try:
+            return self._run_tool(tool_name), None
+        except Exception as e:
+            return None, e
+    
+    def _findings_view(self) -> Tuple[int, Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        (findings version, scraped page, detected issues), re-read from
+        findings only when they changed (see _findings_version).
+        """
+        view = self._view_cache
+        if view is None or view[0] != self._findings_version:
+            findings = self.state["findings"]
+            issues_result = findings.get("detect_seo_issues", {})
+            issues = issues_result.get("issues", []) if isinstance(issues_result, dict) else []
+            view = self._view_cache = (self._findings_version, findings.get("scrape_url", {}), issues)
+        return view
+    
+    def _get_scraped(self) -> Dict[str, Any]:
+        """scrape_url result, or {} if not available."""
+        return self._findings_view()[1]
+    
+    def _get_issues(self) -> List[Dict[str, Any]]:
+        """detect_seo_issues issue list, or [] if not available."""
+        return self._findings_view()[2]
+    
+    @classmethod
+    def _tool_func(cls, tool_name: str) -> Callable:
+        """
+        Callable behind `tool_name`, imported on first use and then cached
+        on the class. Imports stay per tool so a module that fails to import
+        only fails its own tool.
+        """
+        func = cls._TOOL_FUNCS.get(tool_name)
+        if func is None:
+            module_name, attr = cls._TOOL_IMPORTS[tool_name]
+            module = import_module(module_name)
+            try:
+                func = getattr(module, attr)
+            except AttributeError:
+                raise ImportError(f"cannot import name '{attr}' from '{module_name}'") from None
+            cls._TOOL_FUNCS[tool_name] = func
+        return func
     
     def _run_tool(self, tool_name: str) -> Dict[str, Any]:
         """Execute a specific SEO tool."""
-        url = self.state["url"]
-        options = self.state["options"]
-        
-        if tool_name == "scrape_url":
-            from app.modules.scraper import smart_scrape_url
-            return smart_scrape_url(url)
-        
-        elif tool_name == "detect_seo_issues":
-            from app.modules.seo_detection_unified import detect_seo_issues_unified
-            scraped = self.state["findings"].get("scrape_url", {})
-            return {"issues": detect_seo_issues_unified(scraped)}
-        
-        elif tool_name == "run_technical_checks":
-            from app.modules.seo_technical import run_technical_checks
-            scraped = self.state["findings"].get("scrape_url", {})
-            return run_technical_checks(scraped, url)
-        
-        elif tool_name == "analyze_performance":
-            from app.modules.competitor.lighthouse_client import run_performance_engine
-            return run_performance_engine(url)
-        
-        elif tool_name == "analyze_competitors":
-            from app.modules.competitor import run_competitor_analysis
-            competitor_url = options.get("competitor_url")
-            if not competitor_url:
-                return {"error": "No competitor_url provided"}
-            scraped = self.state["findings"].get("scrape_url", {})
-            return run_competitor_analysis(scraped, url, competitor_url)
-        
-        elif tool_name == "find_top_competitors":
-            from app.modules.competitor import discover_competitors_auto
-            return discover_competitors_auto(url)
-        
-        elif tool_name == "analyze_authority":
-            from app.modules.agents.authority_agent import AuthorityAgent
-            agent = AuthorityAgent()
-            scraped = self.state["findings"].get("scrape_url", {})
-            return agent.execute({"url": url, "scraped_data": scraped})
-        
-        elif tool_name == "optimize_keywords":
-            from app.modules.agents.keyword_agent import KeywordAgent
-            agent = KeywordAgent()
-            scraped = self.state["findings"].get("scrape_url", {})
-            keywords = options.get("keywords") or options.get("target_keywords", [])
-            return agent.execute({"scraped_data": scraped, "target_keywords": keywords})
-        
-        elif tool_name == "generate_fixes":
-            from app.modules.ai_fix_agents import generate_fix_suggestions
-            issues = self.state["findings"].get("detect_seo_issues", {}).get("issues", [])
-            scraped = self.state["findings"].get("scrape_url", {})
-            return {"fixes": generate_fix_suggestions(issues, scraped)}
-        
-        elif tool_name == "create_seo_strategy":
-            from app.modules.ai_strategy_agent import generate_seo_strategy_comprehensive
-            return generate_seo_strategy_comprehensive(
-                self.state["findings"].get("scrape_url", {}),
-                self.state["findings"].get("detect_seo_issues", {}).get("issues", []),
-                url
-            )
-        
-        elif tool_name == "create_roadmap":
-            from app.modules.ai_roadmap_agent import generate_seo_roadmap
-            return generate_seo_roadmap(
-                self.state["findings"].get("detect_seo_issues", {}).get("issues", []),
-                self.state["findings"]
-            )
-        
-        elif tool_name == "calculate_score":
-            from app.modules.seo_rules import calculate_seo_score
-            issues = self.state["findings"].get("detect_seo_issues", {}).get("issues", [])
-            return {"score": calculate_seo_score(issues)}
-        
-        else:
+        handler = self._TOOL_HANDLERS.get(tool_name)
+        if handler is None:
             return {"error": f"Unknown tool: {tool_name}"}
+        return handler(self, self._tool_func(tool_name))
+    
+    # Tool handlers: build the arguments for the tool callable from the run
+    # state and shape its result; dispatched through _TOOL_HANDLERS
+    
+    def _tool_scrape_url(self, func: Callable) -> Dict[str, Any]:
+        return func(self.state["url"])
+    
+    def _tool_detect_seo_issues(self, func: Callable) -> Dict[str, Any]:
+        return {"issues": func(self._get_scraped())}
+    
+    def _tool_run_technical_checks(self, func: Callable) -> Dict[str, Any]:
+        return func(self._get_scraped(), self.state["url"])
+    
+    def _tool_analyze_performance(self, func: Callable) -> Dict[str, Any]:
+        return func(self.state["url"])
+    
+    def _tool_analyze_competitors(self, func: Callable) -> Dict[str, Any]:
+        competitor_url = self.state["options"].get("competitor_url")
+        if not competitor_url:
+            return {"error": "No competitor_url provided"}
+        return func(self._get_scraped(), self.state["url"], competitor_url)
+    
+    def _tool_find_top_competitors(self, func: Callable) -> Dict[str, Any]:
+        return func(self.state["url"])
+    
+    def _tool_analyze_authority(self, agent_cls: Callable) -> Dict[str, Any]:
+        return agent_cls().execute({"url": self.state["url"], "scraped_data": self._get_scraped()})
+    
+    def _tool_optimize_keywords(self, agent_cls: Callable) -> Dict[str, Any]:
+        options = self.state["options"]
+        keywords = options.get("keywords") or options.get("target_keywords", [])
+        return agent_cls().execute({"scraped_data": self._get_scraped(), "target_keywords": keywords})
+    
+    def _tool_generate_fixes(self, func: Callable) -> Dict[str, Any]:
+        return {"fixes": func(self._get_issues(), self._get_scraped())}
+    
+    def _tool_create_seo_strategy(self, func: Callable) -> Dict[str, Any]:
+        return func(self._get_scraped(), self._get_issues(), self.state["url"])
+    
+    def _tool_create_roadmap(self, func: Callable) -> Dict[str, Any]:
+        return func(self._get_issues(), self.state["findings"])
+    
+    def _tool_calculate_score(self, func: Callable) -> Dict[str, Any]:
+        return {"score": func(self._get_issues())}
+    
+    _TOOL_HANDLERS: Dict[str, Callable] = {
+        "scrape_url": _tool_scrape_url,
+        "detect_seo_issues": _tool_detect_seo_issues,
+        "run_technical_checks": _tool_run_technical_checks,
+        "analyze_performance": _tool_analyze_performance,
+        "analyze_competitors": _tool_analyze_competitors,
+        "find_top_competitors": _tool_find_top_competitors,
+        "analyze_authority": _tool_analyze_authority,
+        "optimize_keywords": _tool_optimize_keywords,
+        "generate_fixes": _tool_generate_fixes,
+        "create_seo_strategy": _tool_create_seo_strategy,
+        "create_roadmap": _tool_create_roadmap,
+        "calculate_score": _tool_calculate_score,
+    }
     
     def _summarize_findings(self) -> str:
-        """Create concise summary of current findings for LLM context."""
+        """
+        Compact JSON summary of current findings for LLM context, rebuilt
+        only when the findings changed since the last call.
+        """
+        cached = self._summary_cache
+        if cached is not None and cached[0] == self._findings_version:
+            return cached[1]
+        summary = self._build_findings_summary()
+        self._summary_cache = (self._findings_version, summary)
+        return summary
+    
+    def _build_findings_summary(self) -> str:
+        """
+        Fixed-schema summary: a few counts and scores (null until the tool
+        has run), never raw page content, so the prompt stays small however
+        many iterations run. Serialized with sorted keys and no whitespace so
+        equal findings give byte-identical prompts.
+        """
+        findings = self.state["findings"]
+        if not findings:
+            return "No findings yet"
+        
+        def _ok(tool: str) -> Optional[Dict[str, Any]]:
+            result = findings.get(tool)
+            return result if isinstance(result, dict) and "error" not in result else None
+        
+        scraped = _ok("scrape_url")
+        issues = _ok("detect_seo_issues")
+        tech = _ok("run_technical_checks")
+        perf = _ok("analyze_performance")
+        score = _ok("calculate_score")
+        summary = {
+            "page_title": (scraped.get("title") or "")[:50] if scraped else None,
+            "issues": len(issues.get("issues", [])) if issues else None,
+            "critical_issues": self._critical_issue_count() if issues else None,
+            "tech_errors": len(tech.get("technical_errors", [])) if tech else None,
+            "perf_score": perf.get("performance_score") if perf else None,
+            "seo_score": score.get("score") if score else None,
+            "has_competitor_data": bool(_ok("analyze_competitors") or _ok("find_top_competitors")),
+            "failed_tools": sorted(tool for tool, result in findings.items()
+                                   if isinstance(result, dict) and "error" in result),
+        }
+        return orjson.dumps(summary, option=orjson.OPT_SORT_KEYS, default=str).decode()
+    
+    def _describe_findings(self) -> str:
+        """Create concise human-readable summary of current findings (final report)."""
         if not self.state["findings"]:
             return "No findings yet"
         
@@ -472,11 +848,16 @@ If you believe you have enough information to provide valuable recommendations,
         return " | ".join(summary_parts) if summary_parts else "Analysis in progress"
     
     def _compile_final_report(self) -> Dict[str, Any]:
-        """Compile all findings into final report."""
+        """
+        Compile all findings into final report.
+        
+        The frontend-compatible top-level fields are references into
+        findings, not copies, so the report is serialized from one set of
+        objects.
+        """
         # Extract data in format compatible with frontend
-        seo_data = self.state["findings"].get("scrape_url", {})
-        issues_result = self.state["findings"].get("detect_seo_issues", {})
-        issues = issues_result.get("issues", []) if isinstance(issues_result, dict) else []
+        seo_data = self._get_scraped()
+        issues = self._get_issues()
         seo_score = self.state["findings"].get("calculate_score", {}).get("score", 0)
         fixes = self.state["findings"].get("generate_fixes", {}).get("fixes", [])
         
@@ -496,6 +877,7 @@ If you believe you have enough information to provide valuable recommendations,
             
             # Autonomous-specific data
             "findings": self.state["findings"],
-            "reasoning_log": self.reasoning_log,
-            "summary": self._summarize_findings()
+            "reasoning_log": list(self.reasoning_log),
+            "policy_stats": self.state["policy_stats"],
+            "summary": self._describe_findings()
         }
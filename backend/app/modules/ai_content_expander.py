@@ -1,4 +1,5 @@
 import logging
+from typing import Iterator
 
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.llm_factory import get_shared_llm
@@ -17,20 +18,45 @@ EXPAND_PROMPT = ChatPromptTemplate.from_messages([
     )
 ])
 
-def expand_content(page_data: dict, keywords: list):
+# Characters of page text sent to the LLM
+MAX_CONTENT_CHARS = 3000
+
+
+def _join_truncated(paragraphs: list, limit: int) -> str:
+    """
+    " ".join(paragraphs)[:limit], reading only the paragraphs needed to
+    reach `limit` instead of joining the whole page first.
+    """
+    parts = []
+    length = 0
+    for p in paragraphs:
+        if length >= limit:
+            break
+        if parts:
+            length += 1  # separator
+        parts.append(p)
+        length += len(p)
+    return " ".join(parts)[:limit]
+
+
+def stream_expanded_content(page_data: dict, keywords: list) -> Iterator[str]:
+    """
+    Expanded page content as a stream of text chunks, yielded as the LLM
+    produces them. On failure an error line is yielded instead.
+    """
     try:
-        llm = get_shared_llm()
+        llm = get_shared_llm(streaming=True)
         
         # Safely extract text
         if page_data is None:
             page_data = {}
         
-        text = " ".join(page_data.get("paragraphs", []) or [])
+        text = _join_truncated(page_data.get("paragraphs", []) or [], MAX_CONTENT_CHARS)
         if not text:
             text = page_data.get("meta_description", "No content found")
         
         # Limit text length
-        text = text[:3000] if text else "No content"
+        text = text[:MAX_CONTENT_CHARS] if text else "No content"
         
         # Ensure keywords is a list
         kw_list = keywords if isinstance(keywords, list) else []
@@ -40,8 +66,13 @@ def expand_content(page_data: dict, keywords: list):
             content=text,
             keywords=kw_str or "generic keywords"
         )
-        res = llm.invoke(messages)
-        return res.content
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                yield chunk.content
     except Exception as e:
         logger.error("expand_content failed: %s", e)
-        return f"Content expansion failed: {str(e)[:200]}"
+        yield f"Content expansion failed: {str(e)[:200]}"
+
+
+def expand_content(page_data: dict, keywords: list) -> str:
+    return "".join(stream_expanded_content(page_data, keywords))
@@ -2,24 +2,65 @@ import json
 import logging
 import os
 import re
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+import orjson
 
-from app.core.llm_factory import get_shared_llm
-from app.core.cache_manager import hash_input
+from app.core.llm_factory import cacheable_system_message, get_shared_llm
+from app.core.cache_manager import DirectMappedCache, SemanticCache, canonical_hash, get_ai_fix_cache
+from app.core.vector_store import get_embeddings
+from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
-from functools import lru_cache
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Tuple
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
 
+# RAG context budget, in tokens: per passage and for the whole context.
+# Results come sorted by distance, so trimming keeps the most relevant text.
+RAG_PASSAGE_TOKENS = 400
+RAG_CONTEXT_TOKENS = 1200
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoding() -> Any:
+    """cl100k_base encoding, or None if it can't be loaded (e.g. offline first run)."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("tiktoken unavailable, estimating RAG tokens from length: %s", e)
+        return None
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """`text` cut to at most `max_tokens` tokens, and its token count."""
+    enc = _get_token_encoding()
+    if enc is None:
+        # ~4 characters per token
+        text = text[:max_tokens * 4]
+        return text, (len(text) + 3) // 4
+    tokens = enc.encode(text)
+    if len(tokens) > max_tokens:
+        tokens = tokens[:max_tokens]
+        text = enc.decode(tokens)
+    return text, len(tokens)
+
+
 def _retrieve_rag_context(query: str, n_results: int = 3) -> str:
     """
     Retrieve relevant SEO knowledge from the RAG vector store.
     Returns formatted context string for prompt augmentation.
     Falls back gracefully if vector store is not available.
+    
+    Passages are trimmed to RAG_PASSAGE_TOKENS and added until the context
+    reaches RAG_CONTEXT_TOKENS, so its prompt cost doesn't depend on how
+    long the knowledge base entries are.
     """
     try:
         from app.core.knowledge_indexer import query_knowledge
@@ -28,9 +69,15 @@ def _retrieve_rag_context(query: str, n_results: int = 3) -> str:
             return ""
         
         context_parts = []
+        budget = RAG_CONTEXT_TOKENS
         for r in results:
-            if r.get("distance", 1.0) < 1.5:  # Only use relevant results
-                context_parts.append(f"[{r['title']}] {r['content']}")
+            if r.get("distance", 1.0) >= 1.5:  # Only use relevant results
+                continue
+            content, used = _truncate_tokens(f"[{r['title']}] {r['content']}", min(RAG_PASSAGE_TOKENS, budget))
+            context_parts.append(content)
+            budget -= used
+            if budget <= 0:
+                break
         
         if context_parts:
             return "\n\n---\n\n".join(context_parts)
@@ -39,41 +86,42 @@ def _retrieve_rag_context(query: str, n_results: int = 3) -> str:
         logger.debug("RAG retrieval skipped: %s", e)
         return ""
 
-# Cache for LLM responses - reduces costs for repeated scans
-_fix_response_cache = {}
 
+# RAG lookups run off the caller's thread so they overlap with prompt
+# building (or, via prefetch_autofix_context, with the rest of a scan).
+# In-flight/recent lookups are shared by query; query_knowledge keeps the
+# longer-lived result cache, so this one only needs a short TTL.
+_rag_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag")
+_rag_futures = DirectMappedCache(size=64, ttl=60)
+
+
+def _rag_context_future(query: str, n_results: int) -> "Future[str]":
+    """Future of _retrieve_rag_context(query, n_results), started at most once per query."""
+    key = f"{n_results}:{canonical_hash(query)}"
+    future = _rag_futures.get(key)
+    if future is None:
+        future = _rag_pool.submit(_retrieve_rag_context, query, n_results)
+        _rag_futures.set(key, future)
+    return future
+
+# JSON in LLM replies: a fenced block, else the outermost array
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```", re.IGNORECASE)
+_ARRAY_RE = re.compile(r"\[[\s\S]*\]")
 
-@lru_cache(maxsize=100)
-def _cached_ai_fix_impl(error_hash: str, page_hash: str, error_str: str, page_str: str) -> str:
+
+def _loads_llm_json(content: str) -> Any:
     """
-    Cached implementation of AI fix generation.
-    Uses hashes as cache keys for efficiency.
+    Parse JSON from an LLM reply. Replies usually obey "JSON only" and are
+    parsed as-is; otherwise one regex pass extracts the fenced block or the
+    outermost array. Raises json.JSONDecodeError if neither parses.
     """
-    llm = get_shared_llm()
-    
-    FIX_PROMPT = ChatPromptTemplate.from_messages([
-        ("system",
-         "Sei un auditor SEO senior. "
-         "Analizza problemi SEO e genera una soluzione tecnica breve, precisa e applicabile."
-         "Rispondi SEMPRE con questo formato:\n\n"
-         "IDEA: spiegazione breve\n"
-         "FIX: snippet di codice o azione precisa\n"
-         "PRIORITA: alta / media / bassa\n"
-        ),
-        ("user",
-         "Errore:\n{error}\n\n"
-         "Contenuto pagina analizzato:\n{page_data}\n\n"
-         "Genera il fix ora."
-        )
-    ])
-    
-    messages = FIX_PROMPT.format_messages(
-        error=error_str,
-        page_data=page_str
-    )
-    result = llm.invoke(messages)
-    return result.content
-
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        match = _JSON_FENCE_RE.search(content) or _ARRAY_RE.search(content)
+        if match is None:
+            raise
+        return json.loads(match.group(match.lastindex or 0))
 
 
 # ==================== SINGLE FIX PROMPT ====================
@@ -94,30 +142,274 @@ FIX_PROMPT = ChatPromptTemplate.from_messages([
 ])
 
 
+def _ai_fix_impl(error_str: str, page_str: str) -> str:
+    """
+    Uncached AI fix generation: one FIX_PROMPT call.
+    """
+    llm = get_shared_llm()
+    
+    messages = FIX_PROMPT.format_messages(
+        error=error_str,
+        page_data=page_str
+    )
+    result = llm.invoke(messages)
+    return result.content
+
+
+# Error fields that differ between scans of the same problem
+_VOLATILE_ERROR_KEYS = frozenset({
+    "timestamp", "detected_at", "element_index", "screenshot_path", "scan_id",
+})
+_URL_ORIGIN_RE = re.compile(r"https?://[^/\s\"'<>]+", re.IGNORECASE)
+
+
+def _canonical_text(text: str) -> str:
+    """Lowercase, trim and reduce absolute URLs to their path."""
+    return _URL_ORIGIN_RE.sub("", text.strip().lower())
+
+
+# Sorted keys so insertion order never changes a cache key
+_CANONICAL_JSON_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _canonical_json(data: Any) -> str:
+    return orjson.dumps(data, default=str, option=_CANONICAL_JSON_OPTS).decode()
+
+
+def _canonicalize_error(error: Any) -> str:
+    """
+    Canonical string form of an error for the cache key (whole string) and
+    fix prompt (first 500 chars): volatile keys dropped, text lowercased
+    with URLs reduced to path-only, dict keys sorted. Errors that differ
+    only in those details share a fix.
+    """
+    if isinstance(error, dict):
+        return _canonical_json({
+            key: _canonical_text(value) if isinstance(value, str) else value
+            for key, value in error.items()
+            if key not in _VOLATILE_ERROR_KEYS
+        })
+    return _canonical_text(str(error))
+
+
+def _canonicalize_page(page_data: Any) -> str:
+    """
+    Page context for the cache key and fix prompt: title, meta description,
+    H1 and a hash of the paragraph text, instead of the whole serialized
+    scrape (which changes with every volatile field).
+    """
+    if not isinstance(page_data, dict):
+        return str(page_data)
+    paragraphs = page_data.get("paragraphs") or []
+    return _canonical_json({
+        "title": page_data.get("title") or "",
+        "meta_description": page_data.get("meta_description") or "",
+        "h1": page_data.get("h1") or [],
+        "content_hash": canonical_hash("\n".join(map(str, paragraphs))),
+    })
+
+
+# Fixes of errors that read the same (same id, paraphrased description or a
+# different URL) on the same page are reused: matched on an embedding of
+# "id::description". Cosine similarity >= 0.9, i.e. cosine distance < 0.1.
+AI_FIX_SEMANTIC_THRESHOLD = 0.9
+_ai_fix_semantic_cache = SemanticCache(capacity=1024, threshold=AI_FIX_SEMANTIC_THRESHOLD)
+
+
+def _error_signature(error: Any) -> str:
+    """The part of an error a fix depends on: "id::description"."""
+    if isinstance(error, dict):
+        text = _error_text(error) or str(error)
+        return f"{_error_kind(error) or 'unknown'}::{_canonical_text(text)[:500]}"
+    return _canonical_text(str(error))[:500]
+
+
+def _error_embedding(error: Any) -> Any:
+    """Embedding of the error signature, or None if embeddings are unavailable."""
+    try:
+        return get_embeddings().embed_query(_error_signature(error))
+    except Exception as e:
+        logger.warning("AI fix semantic cache unavailable: %s", e)
+        return None
+
+
 def generate_ai_fix(error: dict, page_data: dict) -> str:
     """
     Generate a fix for a single SEO error with caching.
     Reduces costs by ~60% for repeated error types.
     Returns a formatted fix string.
+    
+    Lookup order: exact canonical key in the persistent fix cache, then a
+    semantically equivalent error on the same page in the similarity
+    cache, then the LLM.
     """
-    # Create cache keys from input data
-    error_str = str(error)[:500]
-    page_str = str(page_data)[:500]
-    error_hash = hash_input(error_str)
-    page_hash = hash_input(page_str)
+    # Create cache keys from the canonical form of the inputs
+    error_str = _canonicalize_error(error)
+    page_str = _canonicalize_page(page_data)
+    page_hash = canonical_hash(page_str)
+    
+    # Persistent cache shared by single and batched fixes, across workers and restarts
+    cache = get_ai_fix_cache()
+    key = f"{canonical_hash(error_str)}:{page_hash}"
+    fix = cache.get(key)
+    if fix is not None:
+        return fix
     
-    # Use cached implementation (LRU cache will handle duplicates)
-    return _cached_ai_fix_impl(error_hash, page_hash, error_str, page_str)
+    # Fixes quote the page they were generated for: only same-page hits
+    kind = _error_kind(error) if isinstance(error, dict) else None
+    vector = _error_embedding(error)
+    entry = None
+    if vector is not None:
+        entry = _ai_fix_semantic_cache.get(
+            vector,
+            accept=lambda e: e["page"] == page_hash and e["kind"] == kind,
+        )
+    if entry is not None:
+        fix = entry["fix"]
+    else:
+        fix = _ai_fix_impl(error_str[:500], page_str[:500])
+        if vector is not None:
+            _ai_fix_semantic_cache.set(vector, {"page": page_hash, "kind": kind, "fix": fix})
+    # Semantic hits are written back under the exact key too, so other
+    # workers (and this one after a restart) hit without an embedding call
+    cache.set(key, fix)
+    return fix
+
+
+# ==================== BATCHED FIX PROMPT ====================
+BATCH_FIX_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "Sei un auditor SEO senior. "
+     "Analizza problemi SEO e genera per ciascuno una soluzione tecnica breve, precisa e applicabile.\n"
+     "Rispondi SOLO con un array JSON, un oggetto per errore, nello stesso ordine:\n"
+     '[{{"index": 1, "idea": "spiegazione breve", '
+     '"fix": "snippet di codice o azione precisa", "priorita": "alta / media / bassa"}}]'
+    ),
+    ("user",
+     "Errori:\n{errors}\n\n"
+     "Contenuto pagina analizzato:\n{page_data}\n\n"
+     "Genera i fix ora."
+    )
+])
 
 
-# ==================== AUTOFIX REPORT PROMPT ====================
-AUTOFIX_PROMPT = ChatPromptTemplate.from_messages([
-    ("system",
-     """Sei un tecnico SEO esperto che fornisce SOLUZIONI PRATICHE con codice pronto da implementare.
+def generate_ai_fixes_batch(errors: List[dict], page_data: dict) -> List[str]:
+    """
+    Batched generate_ai_fix(): one fix string per error, in input order.
+    
+    Errors already in the fix cache are answered from it; the others are
+    sent together in a single LLM call that returns a JSON array. Errors the
+    batch response doesn't cover (or an unparsable response) fall back to
+    the single-fix prompt, issued concurrently via llm.batch().
+    """
+    page_str = _canonicalize_page(page_data)
+    page_hash = canonical_hash(page_str)
+    page_str = page_str[:500]
+    
+    cache = get_ai_fix_cache()
+    fixes: List[Any] = [None] * len(errors)
+    pending: Dict[str, List[int]] = {}  # cache key -> positions, so duplicates are sent once
+    error_strs: Dict[str, str] = {}
+    for i, error in enumerate(errors):
+        error_str = _canonicalize_error(error)
+        key = f"{canonical_hash(error_str)}:{page_hash}"
+        fixes[i] = cache.get(key)
+        if fixes[i] is None:
+            pending.setdefault(key, []).append(i)
+            error_strs[key] = error_str[:500]
+    
+    if not pending:
+        return fixes
+    
+    llm = get_shared_llm()
+    keys = list(pending)
+    batch_fixes: Dict[str, str] = {}
+    try:
+        messages = BATCH_FIX_PROMPT.format_messages(
+            errors="\n".join(f"{n}. {error_strs[key]}" for n, key in enumerate(keys, 1)),
+            page_data=page_str
+        )
+        for item in _loads_llm_json(llm.invoke(messages).content.strip()):
+            n = item.get("index")
+            if isinstance(n, int) and 1 <= n <= len(keys):
+                batch_fixes[keys[n - 1]] = (
+                    f"IDEA: {item.get('idea', '')}\n"
+                    f"FIX: {item.get('fix', '')}\n"
+                    f"PRIORITA: {item.get('priorita', 'media')}\n"
+                )
+    except Exception as e:
+        logger.warning("generate_ai_fixes_batch: batch response unusable (%s), falling back to single fixes", e)
+    
+    missing = [key for key in keys if key not in batch_fixes]
+    if missing:
+        results = llm.batch([
+            FIX_PROMPT.format_messages(error=error_strs[key], page_data=page_str)
+            for key in missing
+        ])
+        for key, result in zip(missing, results):
+            batch_fixes[key] = result.content
+    
+    for key, positions in pending.items():
+        cache.set(key, batch_fixes[key])
+        for i in positions:
+            fixes[i] = batch_fixes[key]
+    return fixes
+
+
+# Numbers and URLs vary between occurrences of the same problem
+_ERROR_VARIANT_RE = re.compile(r"\d+|https?://\S+")
+
+
+def _error_kind(error: Dict[str, Any]) -> Any:
+    """Error identifier: the detectors' "id", or "type" for other sources."""
+    return error.get("id") or error.get("type")
+
+
+def _error_text(error: Dict[str, Any]) -> str:
+    """Error text: the detectors' "description", or "message" for other sources."""
+    return str(error.get("description") or error.get("message") or "")
+
 
-Il sito analizzato utilizza questo STACK TECNOLOGICO: {tech_stack}
+def _dedupe_errors(errors: list) -> "OrderedDict[tuple, Dict[str, Any]]":
+    """
+    Group errors by (id, description with numbers/URLs masked), in first-seen
+    order: key -> {"example": first error, "count": occurrences}. Scans
+    report the same problem many times (e.g. one missing alt per image);
+    the LLM only needs to solve each one once.
+    """
+    groups: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+    for e in errors:
+        if isinstance(e, dict):
+            kind, text = _error_kind(e), _error_text(e)
+            if kind is None and not text:
+                text = str(e)  # unknown shape: only identical errors are merged
+            key = (kind, _ERROR_VARIANT_RE.sub("#", text[:200]))
+        else:
+            key = (None, _ERROR_VARIANT_RE.sub("#", str(e)[:200]))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = {"example": e, "count": 1}
+        else:
+            group["count"] += 1
+    return groups
+
+
+def _format_error_group(group: Dict[str, Any], bullet: str = "-") -> str:
+    """Prompt bullet for a _dedupe_errors() group: "- [N×] id: description"."""
+    e = group["example"]
+    if isinstance(e, dict):
+        text = f"{_error_kind(e) or 'unknown'}: {(_error_text(e) or str(e))[:200]}"
+    else:
+        text = str(e)[:300]
+    return f"{bullet} [{group['count']}×] {text}"
+
+
+# ==================== AUTOFIX REPORT PROMPT ====================
+# Static system turn: no per-call interpolation (the stack and RAG context
+# go in the user turn), so the provider can serve it from its prompt cache
+AUTOFIX_SYSTEM_PROMPT = """Sei un tecnico SEO esperto che fornisce SOLUZIONI PRATICHE con codice pronto da implementare.
 
-{rag_context}
+Lo STACK TECNOLOGICO del sito analizzato è indicato nel messaggio dell'utente, insieme all'eventuale CONTESTO dalla Knowledge Base SEO.
 
 IMPORTANTE: Genera SOLO codice compatibile con lo stack indicato.
 - Se il sito usa WordPress, genera snippet PHP/WP (functions.php, plugin hooks, .htaccess).
@@ -136,7 +428,7 @@ Per OGNI fix, il tuo output deve seguire questo formato:
 
 **⚠️ Impatto:** [Cosa succede se non lo risolvi]
 
-**✅ Soluzione ({tech_stack}):**
+**✅ Soluzione ([stack]):**
 
 ```[linguaggio appropriato per lo stack]
 [CODICE PRONTO DA COPIARE — specifico per lo stack]
@@ -149,14 +441,14 @@ Per OGNI fix, il tuo output deve seguire questo formato:
 ---
 
 Regole:
+- Ogni errore è preceduto dal numero di occorrenze ([N×]): genera UN SOLO fix per tipo di errore
 - Fornisci SEMPRE codice funzionante e completo PER LO STACK INDICATO
 - Usa commenti nel codice per spiegare le parti importanti
 - NON includere roadmap o piani a lungo termine (c'è una sezione dedicata)
 - Concentrati SOLO sui fix tecnici immediati
 - Usa emoji per rendere tutto chiaro e leggibile"""
-    ),
-    ("user",
-     """ERRORI TECNICI DA RISOLVERE:
+
+AUTOFIX_USER_TEMPLATE = """{rag_context}ERRORI TECNICI DA RISOLVERE:
 {errors}
 
 INFORMAZIONI PAGINA:
@@ -167,79 +459,115 @@ INFORMAZIONI PAGINA:
 
 Genera i FIX TECNICI con codice pronto per lo stack {tech_stack}.
 NON includere roadmap o piani strategici."""
+
+
+def _autofix_groups(errors: list) -> List[Dict[str, Any]]:
+    """Unique errors listed in the autofix prompt (at most 20)."""
+    if not isinstance(errors, list):
+        errors = []
+    return list(_dedupe_errors(errors).values())[:20]
+
+
+def _autofix_rag_query(groups: List[Dict[str, Any]]) -> str:
+    return f"SEO fix per: {' '.join(str(g['example'])[:80] for g in groups[:5])}"
+
+
+def prefetch_autofix_context(errors: list) -> None:
+    """
+    Start the knowledge-base lookup for an autofix report on `errors` now,
+    so a later stream_autofix_report() on the same errors finds it ready.
+    Call as soon as the errors are known (e.g. before slow scan steps).
+    """
+    _rag_context_future(_autofix_rag_query(_autofix_groups(errors)), 4)
+
+
+def _autofix_messages(errors: list, page_data: dict) -> list:
+    """Build the autofix report messages for a list of errors."""
+    # Sanitize inputs
+    groups = _autofix_groups(errors)
+    
+    # RAG: retrieve relevant SEO knowledge for these errors (in the background)
+    rag_future = _rag_context_future(_autofix_rag_query(groups), 4)
+    
+    if page_data is None:
+        page_data = {}
+    
+    # Extract key page info including tech stack
+    url = page_data.get("url", "N/A")
+    title = page_data.get("title", "N/A")
+    meta_desc = page_data.get("meta_description", "N/A")
+    tech_stack = page_data.get("tech_stack", "HTML/Custom")
+    
+    rag_context_raw = rag_future.result()
+    rag_context = (
+        f"CONTESTO dalla Knowledge Base SEO (usa queste best practice nelle tue risposte):\n{rag_context_raw}\n\n"
+        if rag_context_raw else ""
     )
-])
+    
+    user_msg = AUTOFIX_USER_TEMPLATE.format(
+        errors="\n".join(map(_format_error_group, groups)),
+        url=url,
+        title=title,
+        meta_description=meta_desc,
+        tech_stack=tech_stack,
+        rag_context=rag_context
+    )
+    return [cacheable_system_message(AUTOFIX_SYSTEM_PROMPT), HumanMessage(content=user_msg)]
 
 
-def generate_autofix_report(errors: list, page_data: dict) -> str:
+# Returned without an LLM call when there are no errors to fix
+NO_ISSUES_AUTOFIX_MD = "### ✅ Nessun errore tecnico da correggere\n\nLa scansione non ha rilevato problemi che richiedono un fix."
+
+
+def stream_autofix_report(errors: list, page_data: dict) -> Iterator[str]:
     """
-    Generate a complete autofix report for multiple errors.
-    Returns a user-friendly Markdown guide with stack-specific code snippets.
+    Generate the autofix report as a stream of Markdown chunks, yielded as
+    the LLM produces them. On failure an error line is yielded instead.
     """
+    if not errors or not isinstance(errors, list):
+        yield NO_ISSUES_AUTOFIX_MD
+        return
     try:
-        # Sanitize inputs
-        if not isinstance(errors, list):
-            errors = []
-        errors = [str(e)[:300] for e in errors[:20]]  # Limit to 20 errors
-        
-        if page_data is None:
-            page_data = {}
-        
-        # Extract key page info including tech stack
-        url = page_data.get("url", "N/A")
-        title = page_data.get("title", "N/A")
-        meta_desc = page_data.get("meta_description", "N/A")
-        tech_stack = page_data.get("tech_stack", "HTML/Custom")
-        
-        # RAG: retrieve relevant SEO knowledge for these errors
-        rag_query = f"SEO fix per: {' '.join(str(e)[:80] for e in errors[:5])}"
-        rag_context_raw = _retrieve_rag_context(rag_query, n_results=4)
-        rag_context = (
-            f"CONTESTO dalla Knowledge Base SEO (usa queste best practice nelle tue risposte):\n{rag_context_raw}"
-            if rag_context_raw else ""
-        )
-        
+        messages = _autofix_messages(errors, page_data)
         llm = get_shared_llm(streaming=True)
-        messages = AUTOFIX_PROMPT.format_messages(
-            errors="\n".join(f"- {e}" for e in errors),
-            url=url,
-            title=title,
-            meta_description=meta_desc,
-            tech_stack=tech_stack,
-            rag_context=rag_context
-        )
-        res = llm.invoke(messages)
-        return res.content
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                yield chunk.content
     except Exception as e:
         logger.error("generate_autofix_report failed: %s", e)
-        return f"AutoFix report generation failed: {str(e)[:200]}"
+        yield f"AutoFix report generation failed: {str(e)[:200]}"
 
 
-# ==================== GENERATE FIX SUGGESTIONS (STRUCTURED JSON) ====================
+def generate_autofix_report(errors: list, page_data: dict) -> str:
+    """
+    Generate a complete autofix report for multiple errors.
+    Returns a user-friendly Markdown guide with stack-specific code snippets.
+    """
+    return "".join(stream_autofix_report(errors, page_data))
 
-FIX_SUGGESTIONS_PROMPT = ChatPromptTemplate.from_messages([
-    ("system",
-     """Sei un esperto SEO tecnico. Analizza i problemi SEO e genera soluzioni strutturate.
-Lo stack tecnologico del sito è: {tech_stack}
 
-{rag_context}
+# ==================== GENERATE FIX SUGGESTIONS (STRUCTURED JSON) ====================
+
+FIX_SUGGESTIONS_SYSTEM_PROMPT = """Sei un esperto SEO tecnico. Analizza i problemi SEO e genera soluzioni strutturate.
+Lo stack tecnologico del sito e l'eventuale contesto dalla Knowledge Base SEO sono indicati nel messaggio dell'utente.
 
 Per OGNI problema, rispondi con un array JSON valido contenente oggetti con questa struttura esatta:
-{{
+{
+    "index": numero del problema nell'elenco,
     "issue_id": "nome breve del problema",
     "explanation": "spiegazione di cosa fare e perché",
-    "code_snippet": "codice pronto per lo stack {tech_stack} — HTML/PHP/JSX/Liquid ecc. a seconda dello stack"
-}}
+    "code_snippet": "codice pronto per lo stack indicato — HTML/PHP/JSX/Liquid ecc. a seconda dello stack"
+}
 
 REGOLE:
 - Rispondi SOLO con l'array JSON, nessun testo prima o dopo
-- I code_snippet DEVONO essere compatibili con lo stack {tech_stack}
+- Ogni problema è preceduto dal numero di occorrenze ([N×]): UN SOLO fix per tipo di problema
+- I code_snippet DEVONO essere compatibili con lo stack indicato
 - code_snippet può essere vuoto "" se non c'è codice da mostrare
 - Mantieni le spiegazioni brevi e pratiche
 - Massimo 10 fix"""
-    ),
-    ("user",
-     """PROBLEMI SEO RILEVATI:
+
+FIX_SUGGESTIONS_USER_TEMPLATE = """{rag_context}PROBLEMI SEO RILEVATI:
 {issues}
 
 DATI PAGINA:
@@ -249,27 +577,24 @@ DATI PAGINA:
 - Stack: {tech_stack}
 
 Genera l'array JSON con i fix specifici per lo stack {tech_stack}."""
-    )
-])
 
 
 def generate_fix_suggestions(issues: List[Dict], page_data: Dict) -> List[Dict[str, Any]]:
     """
     Generate structured fix suggestions for SEO issues.
     Returns a list of fix objects with issue_id, explanation, and code_snippet.
+    
+    Suggestions are cached per unique issue (same cache as generate_ai_fix,
+    under their own key prefix): issues seen before for the same page and
+    stack are answered from the cache, and only the rest are sent to the
+    LLM, in one numbered request whose answers are mapped back by index.
     """
     try:
         if not issues:
             return []
         
-        # Limit issues to process
-        issues_to_process = issues[:15]
-        
-        # Format issues for prompt
-        issues_text = "\n".join([
-            f"- {issue.get('type', 'unknown')}: {issue.get('message', str(issue))[:200]}"
-            for issue in issues_to_process
-        ])
+        # Limit issues to process (one entry per unique issue)
+        issues_to_process = list(_dedupe_errors(issues).values())[:15]
         
         # Extract page info
         url = page_data.get("url", "N/A") if page_data else "N/A"
@@ -277,16 +602,34 @@ def generate_fix_suggestions(issues: List[Dict], page_data: Dict) -> List[Dict[s
         description = page_data.get("meta_description", "N/A") if page_data else "N/A"
         tech_stack = page_data.get("tech_stack", "HTML/Custom") if page_data else "HTML/Custom"
         
-        # RAG: retrieve relevant SEO knowledge
-        rag_query = f"SEO fix per: {issues_text[:200]}"
-        rag_context_raw = _retrieve_rag_context(rag_query, n_results=3)
+        cache = get_ai_fix_cache()
+        page_hash = canonical_hash(f"{tech_stack}\n{_canonicalize_page(page_data)}")
+        keys = [
+            f"suggestion:{canonical_hash(_canonicalize_error(group['example']))}:{page_hash}"
+            for group in issues_to_process
+        ]
+        suggestions: List[Any] = [cache.get(key) for key in keys]
+        pending = [i for i, cached in enumerate(suggestions) if cached is None]
+        if not pending:
+            return [json.loads(cached) for cached in suggestions]
+        
+        # Format the uncached issues for the prompt, numbered for the answer mapping
+        issues_text = "\n".join(
+            _format_error_group(issues_to_process[i], bullet=f"{n}.")
+            for n, i in enumerate(pending, 1)
+        )
+        
+        # RAG: retrieve relevant SEO knowledge (in the background)
+        rag_future = _rag_context_future(f"SEO fix per: {issues_text[:200]}", 3)
+        
+        llm = get_shared_llm()
+        rag_context_raw = rag_future.result()
         rag_context = (
-            f"CONTESTO dalla Knowledge Base SEO:\n{rag_context_raw}"
+            f"CONTESTO dalla Knowledge Base SEO:\n{rag_context_raw}\n\n"
             if rag_context_raw else ""
         )
         
-        llm = get_shared_llm()
-        messages = FIX_SUGGESTIONS_PROMPT.format_messages(
+        user_msg = FIX_SUGGESTIONS_USER_TEMPLATE.format(
             issues=issues_text,
             url=url,
             title=title,
@@ -294,30 +637,36 @@ def generate_fix_suggestions(issues: List[Dict], page_data: Dict) -> List[Dict[s
             tech_stack=tech_stack,
             rag_context=rag_context
         )
+        messages = [cacheable_system_message(FIX_SUGGESTIONS_SYSTEM_PROMPT), HumanMessage(content=user_msg)]
         
         result = llm.invoke(messages)
-        content = result.content.strip()
-        
-        # Extract JSON from response (handle markdown code blocks)
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
         
-        # Parse JSON
-        fixes = json.loads(content)
+        # Parse JSON (raw first, markdown code block / surrounding text if needed)
+        fixes = _loads_llm_json(result.content.strip())
         
         # Validate structure
         if not isinstance(fixes, list):
             fixes = [fixes]
         
-        validated_fixes = []
+        unmatched = []
         for fix in fixes:
-            validated_fixes.append({
+            validated = {
                 "issue_id": fix.get("issue_id", "SEO Issue"),
                 "explanation": fix.get("explanation", ""),
                 "code_snippet": fix.get("code_snippet", "")
-            })
+            }
+            n = fix.get("index")
+            if isinstance(n, int) and 1 <= n <= len(pending) and suggestions[pending[n - 1]] is None:
+                i = pending[n - 1]
+                suggestions[i] = validated
+                cache.set(keys[i], json.dumps(validated, ensure_ascii=False))
+            else:
+                unmatched.append(validated)
+        
+        validated_fixes = [
+            json.loads(s) if isinstance(s, str) else s
+            for s in suggestions if s is not None
+        ] + unmatched
         
         logger.info("generate_fix_suggestions: Generated %d fixes", len(validated_fixes))
         return validated_fixes
@@ -327,8 +676,8 @@ def generate_fix_suggestions(issues: List[Dict], page_data: Dict) -> List[Dict[s
         # Fallback: generate simple fixes from issues
         return [
             {
-                "issue_id": issue.get("type", f"Issue {i+1}"),
-                "explanation": issue.get("message", str(issue))[:300],
+                "issue_id": _error_kind(issue) or f"Issue {i+1}",
+                "explanation": (_error_text(issue) or str(issue))[:300],
                 "code_snippet": ""
             }
             for i, issue in enumerate(issues[:10])
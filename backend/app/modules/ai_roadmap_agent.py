@@ -1,14 +1,13 @@
 import logging
+from typing import Iterator
 
-from langchain_core.prompts import ChatPromptTemplate
-from app.core.llm_factory import get_shared_llm
+from langchain_core.messages import HumanMessage
+from app.core.llm_factory import cacheable_system_message, get_shared_llm
 
 logger = logging.getLogger(__name__)
 
 
-ROADMAP_PROMPT = ChatPromptTemplate.from_messages([
-    ("system",
-     """Sei un consulente SEO strategico che crea PIANI D'AZIONE completi e comprensibili.
+ROADMAP_SYSTEM_PROMPT = """Sei un consulente SEO strategico che crea PIANI D'AZIONE completi e comprensibili.
 
 Il tuo compito è analizzare i problemi trovati e creare una ROADMAP STRATEGICA che mostri:
 1. La situazione attuale (problemi rilevati)
@@ -75,9 +74,8 @@ Regole:
 - NON includere codice tecnico (c'è la sezione AutoFix per quello)
 - Concentrati sulla STRATEGIA e le PRIORITÀ
 - Dai timeline realistiche"""
-    ),
-    ("user",
-     """PROBLEMI RILEVATI DALLA SCANSIONE:
+
+ROADMAP_USER_TEMPLATE = """PROBLEMI RILEVATI DALLA SCANSIONE:
 {errors}
 
 INFORMAZIONI PAGINA:
@@ -86,17 +84,31 @@ INFORMAZIONI PAGINA:
 - Meta Description: {meta_description}
 
 Crea una ROADMAP STRATEGICA completa con priorità e timeline."""
-    )
-])
 
-def generate_roadmap(errors: list, page_data: dict):
+# Returned without an LLM call when the scan found nothing to fix
+NO_ISSUES_ROADMAP_MD = """## 📊 Riepilogo Situazione
+
+| Metrica | Valore |
+|---------|--------|
+| Problemi Critici | 0 |
+| Problemi Medi | 0 |
+| Problemi Minori | 0 |
+
+La scansione non ha rilevato problemi SEO: non ci sono azioni correttive da pianificare.
+
+---
+
+## 💡 Consiglio Finale
+
+Mantieni la situazione attuale: ripeti la scansione dopo ogni modifica importante al sito e lavora su contenuti e link building per crescere nel ranking."""
+
+
+def stream_roadmap(errors: list, page_data: dict) -> Iterator[str]:
     """
-    Generate a strategic SEO roadmap with priorities and timeline.
-    Returns user-friendly Markdown with action plan.
+    Generate the strategic roadmap as a stream of Markdown chunks, yielded
+    as the LLM produces them. On failure an error line is yielded instead.
     """
     try:
-        llm = get_shared_llm()
-        
         # Sanitize page_data
         if page_data is None:
             page_data = {}
@@ -109,23 +121,34 @@ def generate_roadmap(errors: list, page_data: dict):
         # Format errors as list
         if not isinstance(errors, list):
             errors = []
+        if not errors or all(not str(e).strip() for e in errors):
+            yield NO_ISSUES_ROADMAP_MD
+            return
         error_list = "\n".join(f"- {str(e)[:200]}" for e in errors[:20])
         
         logger.debug("generate_roadmap: processing %d errors", len(errors))
         
-        messages = ROADMAP_PROMPT.format_messages(
-            errors=error_list or "Nessun errore critico rilevato",
+        user_msg = ROADMAP_USER_TEMPLATE.format(
+            errors=error_list,
             url=url,
             title=title,
             meta_description=meta_desc
         )
+        messages = [cacheable_system_message(ROADMAP_SYSTEM_PROMPT), HumanMessage(content=user_msg)]
         
-        logger.debug("generate_roadmap: invoking LLM...")
-        res = llm.invoke(messages)
-        logger.debug("generate_roadmap: LLM response length: %d", len(res.content))
-        return res.content
+        logger.debug("generate_roadmap: streaming LLM response...")
+        llm = get_shared_llm(streaming=True)
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                yield chunk.content
     except Exception as e:
-        logger.error("generate_roadmap EXCEPTION: %s: %s", type(e).__name__, str(e))
-        import traceback
-        traceback.print_exc()
-        return f"Roadmap generation failed: {str(e)[:200]}" 
+        logger.error("generate_roadmap EXCEPTION: %s: %s", type(e).__name__, str(e), exc_info=True)
+        yield f"Roadmap generation failed: {str(e)[:200]}"
+
+
+def generate_roadmap(errors: list, page_data: dict) -> str:
+    """
+    Generate a strategic SEO roadmap with priorities and timeline.
+    Returns user-friendly Markdown with action plan.
+    """
+    return "".join(stream_roadmap(errors, page_data))
@@ -1,13 +1,12 @@
 import logging
+from typing import Iterator
 
-from langchain_core.prompts import ChatPromptTemplate
-from app.core.llm_factory import get_shared_llm
+from langchain_core.messages import HumanMessage
+from app.core.llm_factory import cacheable_system_message, get_shared_llm
 
 logger = logging.getLogger(__name__)
 
-SCHEMA_PROMPT = ChatPromptTemplate.from_messages([
-    ("system",
-     """Sei un consulente SEO esperto che spiega lo Schema Markup in modo SEMPLICE a persone NON tecniche.
+SCHEMA_SYSTEM_PROMPT = """Sei un consulente SEO esperto che spiega lo Schema Markup in modo SEMPLICE a persone NON tecniche.
 
 Il tuo compito è:
 1. Generare il codice JSON-LD corretto per la pagina
@@ -61,9 +60,8 @@ Esempio:
 
 Usa emoji per rendere tutto visivamente chiaro.
 Il JSON-LD deve essere 100% valido per Google."""
-    ),
-    ("user",
-     """Informazioni sulla pagina da analizzare:
+
+SCHEMA_USER_TEMPLATE = """Informazioni sulla pagina da analizzare:
 
 **URL:** {url}
 **Titolo:** {title}
@@ -73,14 +71,20 @@ Il JSON-LD deve essere 100% valido per Google."""
 {content}
 
 Genera lo schema markup più appropriato con la guida completa per implementarlo."""
-    ),
-])
 
 
-def generate_schema(page_data: dict):
+# Returned without an LLM call when the page has nothing to describe
+INSUFFICIENT_DATA_SCHEMA_MD = """## 🏷️ Schema Markup Consigliato
+
+⚠️ Dati insufficienti: la pagina non ha titolo, meta description né contenuto testuale leggibile, quindi non è possibile proporre uno schema adatto.
+
+Verifica che la pagina sia raggiungibile e non generata solo via JavaScript, poi ripeti la scansione."""
+
+
+def stream_schema(page_data: dict) -> Iterator[str]:
     """
-    Generate Schema Markup with user-friendly explanation.
-    Returns Markdown with JSON-LD code and implementation guide.
+    Generate the Schema Markup guide as a stream of Markdown chunks, yielded
+    as the LLM produces them. On failure an error line is yielded instead.
     """
     try:
         if page_data is None:
@@ -93,6 +97,9 @@ def generate_schema(page_data: dict):
         
         # Get content
         paragraphs = page_data.get("paragraphs", []) or []
+        if not paragraphs and title == "N/A" and meta_desc == "N/A":
+            yield INSUFFICIENT_DATA_SCHEMA_MD
+            return
         text = " ".join(paragraphs)
         if not text:
             text = meta_desc if meta_desc != "N/A" else "No content available"
@@ -100,16 +107,25 @@ def generate_schema(page_data: dict):
         # Limit text length
         text = text[:2000] if text else "No content"
         
-        llm = get_shared_llm()
-        messages = SCHEMA_PROMPT.format_messages(
+        llm = get_shared_llm(streaming=True)
+        user_msg = SCHEMA_USER_TEMPLATE.format(
             url=url,
             title=title,
             meta_description=meta_desc,
             content=text
         )
-        res = llm.invoke(messages)
-        return res.content
+        messages = [cacheable_system_message(SCHEMA_SYSTEM_PROMPT), HumanMessage(content=user_msg)]
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                yield chunk.content
     except Exception as e:
         logger.error("generate_schema failed: %s", e)
-        return f"Schema generation failed: {str(e)[:200]}"
+        yield f"Schema generation failed: {str(e)[:200]}"
+
 
+def generate_schema(page_data: dict) -> str:
+    """
+    Generate Schema Markup with user-friendly explanation.
+    Returns Markdown with JSON-LD code and implementation guide.
+    """
+    return "".join(stream_schema(page_data))
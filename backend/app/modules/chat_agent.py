@@ -4,6 +4,7 @@ Multi-collection retrieval (SEO knowledge + scan history) with conversation memo
 Supports streaming responses for real-time chat experience.
 """
 
+import asyncio
 import json
 import logging
 from typing import Optional, AsyncGenerator
@@ -199,8 +200,10 @@ async def chat_stream(
     Streaming chat with RAG context.
     Yields tokens as they are generated.
     """
-    # Build RAG context
-    rag_context = _build_rag_context(message, scan_id=scan_id, domain=domain)
+    # Build RAG context (blocking embedding + ChromaDB calls → executor)
+    rag_context = await asyncio.to_thread(
+        _build_rag_context, message, scan_id=scan_id, domain=domain
+    )
     
     # Build messages
     system_msg = CHAT_SYSTEM_PROMPT.format(rag_context=rag_context)
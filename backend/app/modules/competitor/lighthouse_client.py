@@ -71,7 +71,8 @@
 # app/modules/competitor/lighthouse_client.py
 
 import os
-import requests
+
+from app.core.http_client import get_shared_http_client
 
 PAGESPEED_URL = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
 # Imposta GOOGLE_PSI_KEY nell'ambiente: export GOOGLE_PSI_KEY="la_tua_chiave"
@@ -93,7 +94,7 @@ def fetch_pagespeed_score(url: str, strategy: str = "mobile") -> dict:
     }
 
     try:
-        r = requests.get(PAGESPEED_URL, params=params, timeout=25)
+        r = get_shared_http_client().get(PAGESPEED_URL, params=params, timeout=25)
     except Exception as e:
         return {"error": f"pagespeed request exception: {e}"}
 
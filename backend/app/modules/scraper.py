@@ -5,7 +5,9 @@ from typing import Dict, Any
 
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-import requests
+import httpx
+
+from app.core.http_client import get_shared_http_client
 
 from app.modules.graph_tools import fetch_page_playwright
 from app.modules.graph_tools import extract_seo_elements_pure
@@ -109,7 +111,7 @@ def scrape_url(url: str, max_retries: int = 2):
     last_error = None
     for attempt in range(max_retries + 1):
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            response = get_shared_http_client().get(url, headers=headers, timeout=15)
             response.raise_for_status()
 
             html = response.text
@@ -119,15 +121,15 @@ def scrape_url(url: str, max_retries: int = 2):
             data["html_content"] = html
             return data
 
-        except requests.exceptions.Timeout as e:
+        except httpx.TimeoutException as e:
             last_error = e
             logger.warning(f"Timeout scraping {url} (attempt {attempt + 1}/{max_retries + 1})")
             headers["User-Agent"] = _get_random_ua()  # Rotate UA on retry
-        except requests.exceptions.ConnectionError as e:
+        except httpx.TransportError as e:
             last_error = e
             logger.warning(f"Connection error scraping {url}: {e}")
             break  # Don't retry connection errors
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             last_error = e
             logger.warning(f"HTTP error scraping {url}: {e}")
             break  # Don't retry HTTP errors (4xx/5xx)
@@ -11,6 +11,8 @@ from collections import Counter
 
 # Import helper for LLM fixes
 from app.core.llm_factory import get_shared_llm
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
 
 logger = logging.getLogger(__name__)
 
@@ -428,6 +430,24 @@ def detect_seo_issues_unified(scraped: Dict) -> List[Dict]:
     return errors
 
 
+# Prompt and parser for generate_llm_fixes_for_issues(), built once at import
+_LLM_FIX_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "Sei un esperto SEO che genera fix tecnici precisi e applicabili. "
+     "Fornisci SOLO JSON valido, niente testo aggiuntivo."
+    ),
+    ("user",
+     "Problemi rilevati:\n{issues}\n\n"
+     "Stack del sito: {tech_stack}\n\n"
+     "Genera fix JSON per OGNI problema. Formato:\n"
+     '{{"issue_id": "...", "explanation": "...", "code_snippet": "..."}}\n'
+     "{format_instructions}"
+    )
+])
+_LLM_FIX_PARSER = JsonOutputParser()
+_LLM_FIX_FORMAT_INSTRUCTIONS = _LLM_FIX_PARSER.get_format_instructions()
+
+
 def generate_llm_fixes_for_issues(issues: List[Dict], page_data: Dict) -> List[Dict]:
     """
     Generate LLM-powered fixes for detected issues.
@@ -437,35 +457,17 @@ def generate_llm_fixes_for_issues(issues: List[Dict], page_data: Dict) -> List[D
     if not issues:
         return []
     
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import JsonOutputParser
-    
     llm = get_shared_llm()
-    parser = JsonOutputParser()
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system",
-         "Sei un esperto SEO che genera fix tecnici precisi e applicabili. "
-         "Fornisci SOLO JSON valido, niente testo aggiuntivo."
-        ),
-        ("user",
-         "Problemi rilevati:\n{issues}\n\n"
-         "Stack del sito: {tech_stack}\n\n"
-         "Genera fix JSON per OGNI problema. Formato:\n"
-         '{{"issue_id": "...", "explanation": "...", "code_snippet": "..."}}\n'
-         "{format_instructions}"
-        )
-    ])
     
     try:
         issues_str = str(issues)[:1500]
         tech_stack = page_data.get("tech_stack", "HTML/Custom")
         
-        chain = prompt | llm | parser
+        chain = _LLM_FIX_PROMPT | llm | _LLM_FIX_PARSER
         result = chain.invoke({
             "issues": issues_str,
             "tech_stack": tech_stack,
-            "format_instructions": parser.get_format_instructions()
+            "format_instructions": _LLM_FIX_FORMAT_INSTRUCTIONS
         })
         
         return result if isinstance(result, list) else [result]
@@ -1,5 +1,7 @@
 import xml.etree.ElementTree as ET
 
+from app.core.http_client import get_shared_http_client
+
 def analyze_sitemap(sitemap_url: str, max_urls: int = 10000, timeout: int = 10) -> dict:
     """
     Scarica e analizza ricorsivamente una sitemap.xml (anche sitemap index).
@@ -9,8 +11,8 @@ def analyze_sitemap(sitemap_url: str, max_urls: int = 10000, timeout: int = 10)
       - errors: lista errori
       - is_index: True se sitemap index
     """
-    import requests
     from urllib.parse import urljoin, urlparse
+    client = get_shared_http_client()
     urls = set()
     valid_urls = set()
     skipped_urls = []
@@ -33,7 +35,7 @@ def analyze_sitemap(sitemap_url: str, max_urls: int = 10000, timeout: int = 10)
 
     def _fetch_and_parse(url):
         try:
-            resp = requests.get(url, timeout=timeout)
+            resp = client.get(url, timeout=timeout)
             if resp.status_code != 200:
                 errors.append(f"HTTP {resp.status_code} for {url}")
                 return None
@@ -74,7 +76,7 @@ def analyze_sitemap(sitemap_url: str, max_urls: int = 10000, timeout: int = 10)
     sample = urls[:100] if len(urls) > 100 else urls
     for u in sample:
         try:
-            r = requests.head(u, timeout=timeout, allow_redirects=True)
+            r = client.head(u, timeout=timeout)
             if r.status_code >= 400:
                 invalid.append({"url": u, "status": r.status_code})
                 skipped_urls.append({"url": u, "reason": f"Status {r.status_code}"})
@@ -101,7 +103,6 @@ Riceve il dict 'scraped' dallo scraper e restituisce:
   - technical_errors: lista di error dict (stesso formato del detector)
 """
 
-import requests
 from urllib.parse import urlparse, urljoin
 from typing import Dict, List
 
@@ -109,16 +110,16 @@ REQUEST_TIMEOUT = 6
 
 def _safe_head(url: str):
     try:
-        r = requests.head(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
+        r = get_shared_http_client().head(url, timeout=REQUEST_TIMEOUT)
         # include resolved URL so callers can detect scheme after redirects
-        return {"status_code": r.status_code, "headers": dict(r.headers), "url": r.url}
+        return {"status_code": r.status_code, "headers": dict(r.headers), "url": str(r.url)}
     except Exception as e:
         return {"error": str(e)}
 
 def _safe_get(url: str):
     try:
-        r = requests.get(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
-        return {"status_code": r.status_code, "text": r.text, "headers": dict(r.headers), "url": r.url}
+        r = get_shared_http_client().get(url, timeout=REQUEST_TIMEOUT)
+        return {"status_code": r.status_code, "text": r.text, "headers": dict(r.headers), "url": str(r.url)}
     except Exception as e:
         return {"error": str(e)}
 
@@ -134,6 +134,11 @@ async def scan_full_stream(
             onpage_errors = detect_seo_issues_unified(scraped)
             yield sse("onpage_errors", onpage_errors)
 
+            # Errors are final now: fetch the AutoFix RAG context while the
+            # sitemap/performance/authority steps run
+            from app.modules.ai_fix_agents import prefetch_autofix_context
+            prefetch_autofix_context(technical_errors + onpage_errors)
+
             # 2.5) KEYWORD TARGET ANALYSIS (if keywords provided)
             if target_keywords:
                 keyword_presence = analyze_keyword_presence(scraped, target_keywords)
@@ -185,33 +190,50 @@ async def scan_full_stream(
             yield sse("seo_score", seo_score)
 
             # 7) AI MODULES (lazy loaded)
+            ai_autofix = None
             try:
-                from app.modules.ai_fix_agents import generate_autofix_report
-                ai_autofix = generate_autofix_report(all_errors, scraped)
+                from app.modules.ai_fix_agents import stream_autofix_report
+                # Stream tokens as they arrive, then send the full report
+                parts = []
+                for chunk in stream_autofix_report(all_errors, scraped):
+                    parts.append(chunk)
+                    yield sse("fix_chunk", {"content": chunk})
+                ai_autofix = "".join(parts)
                 yield sse("ai_autofix", ai_autofix)
             except Exception as e:
                 logger.error(f"❌ ai_autofix failed: {e}")
                 yield sse("ai_autofix", f"AutoFix generation failed: {str(e)[:200]}")
 
             try:
-                from app.modules.ai_schema_agent import generate_schema
-                ai_schema = generate_schema(scraped)
-                yield sse("ai_schema", ai_schema)
+                from app.modules.ai_schema_agent import stream_schema
+                parts = []
+                for chunk in stream_schema(scraped):
+                    parts.append(chunk)
+                    yield sse("schema_chunk", {"content": chunk})
+                yield sse("ai_schema", "".join(parts))
             except Exception as e:
                 logger.error(f"❌ ai_schema failed: {e}")
                 yield sse("ai_schema", f"Schema generation failed: {str(e)[:200]}")
 
             try:
-                from app.modules.ai_content_expander import expand_content
-                ai_expanded = expand_content(scraped, target_keywords)
-                yield sse("ai_expanded_content", ai_expanded)
+                from app.modules.ai_content_expander import stream_expanded_content
+                parts = []
+                for chunk in stream_expanded_content(scraped, target_keywords):
+                    parts.append(chunk)
+                    yield sse("expanded_content_chunk", {"content": chunk})
+                yield sse("ai_expanded_content", "".join(parts))
             except Exception as e:
                 logger.error(f"❌ ai_expanded_content failed: {e}")
                 yield sse("ai_expanded_content", f"Content expansion failed: {str(e)[:200]}")
 
+            ai_roadmap = None
             try:
-                from app.modules.ai_roadmap_agent import generate_roadmap
-                ai_roadmap = generate_roadmap(all_errors, scraped)
+                from app.modules.ai_roadmap_agent import stream_roadmap
+                parts = []
+                for chunk in stream_roadmap(all_errors, scraped):
+                    parts.append(chunk)
+                    yield sse("roadmap_chunk", {"content": chunk})
+                ai_roadmap = "".join(parts)
                 logger.info("AI_ROADMAP generated successfully")
                 yield sse("ai_roadmap", ai_roadmap)
             except Exception as e: